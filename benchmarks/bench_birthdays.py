@@ -0,0 +1,93 @@
+"""
+Measures GET /contacts/birthdays/{n} repository latency as a user's address book grows.
+
+Every seeded user has the same 50 contacts inside the window, the rest fall outside it,
+so with the expression index the latency should stay flat while the row count grows.
+
+Usage: python -m benchmarks.bench_birthdays [--url sqlite+aiosqlite:///bench.db] [--sizes 1000 10000 100000]
+"""
+from datetime import date, timedelta
+from statistics import median
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import insert
+
+from src.database.models import Base, Contacts, Users
+from src.database.migrations import upgrade
+from src.repository.contacts import ContactsDB
+
+
+MATCHING = 50
+DAYS = 7
+
+
+def contact_rows(user_id: int, size: int, today: date) -> list[dict]:
+    rows = []
+    for number in range(1, size + 1):
+        if number <= MATCHING:
+            birthday = (today + timedelta(days = number % DAYS)).replace(year = 1992)
+        else:
+            birthday = (today + timedelta(days = DAYS + 1 + number % 300)).replace(year = 1992)
+        rows.append({
+            "number": number,
+            "name": f"name{number}",
+            "surname": f"surname{number}",
+            "email_address": f"contact{number}@example.com",
+            "phone_number": "+01234567899",
+            "birthday": birthday,
+            "user": user_id
+        })
+    return rows
+
+
+async def bench(url: str, sizes: list[int], repeat: int) -> list[dict]:
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    today = date.today()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade)
+
+    report = []
+
+    for user_id, size in enumerate(sizes, start = 1):
+        async with session_maker() as db:
+            db.add(Users(id = user_id, username = f"user{user_id}", email = f"user{user_id}@example.com", password = "-"))
+            await db.flush()
+            rows = contact_rows(user_id, size, today)
+            for offset in range(0, size, 10000):
+                await db.execute(insert(Contacts), rows[offset:offset + 10000])
+            await db.commit()
+
+        timings = []
+        user = Users(id = user_id)
+        for _ in range(repeat):
+            async with session_maker() as db:
+                started = time.perf_counter()
+                contacts = await ContactsDB(db = db).get_contacts_by_birthday(user, today, DAYS)
+                timings.append(time.perf_counter() - started)
+
+        report.append({
+            "contacts": size,
+            "matched": len(contacts),
+            "p50_ms": round(median(timings) * 1000, 3),
+            "max_ms": round(max(timings) * 1000, 3)
+        })
+
+    await engine.dispose()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default = "sqlite+aiosqlite:///bench_birthdays.db")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [1000, 10000, 100000])
+    parser.add_argument("--repeat", type = int, default = 50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.url, args.sizes, args.repeat)), indent = 2))
@@ -0,0 +1,42 @@
+"""
+Measures the cost of authenticating a request's bearer token.
+
+- ``decode``: full ``jwt.decode`` with signature and claim checks on every request.
+- ``cached``: ``Auth.decode_token``, where repeated requests with the same token hit the verified-token cache.
+
+Usage: python -m benchmarks.bench_jwt [--count 100000] [--tokens 100]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from jose import jwt
+
+from src.services.auth import Auth
+
+
+def timed(count: int, tokens: list[str], decode) -> dict:
+    start = time.perf_counter()
+    for n in range(count):
+        decode(tokens[n % len(tokens)])
+    elapsed = time.perf_counter() - start
+    return {"per_request_us": round(elapsed / count * 1e6, 2), "requests_per_second": round(count / elapsed)}
+
+
+async def bench(count: int, sessions: int) -> dict:
+    auth = Auth()
+    tokens = [await auth.create_access_token({"sub": str(n)}) for n in range(sessions)]
+
+    return {
+        "decode": timed(count, tokens, lambda token: jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])),
+        "cached": timed(count, tokens, auth.decode_token),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.count, args.tokens)), indent=2))
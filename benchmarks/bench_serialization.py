@@ -0,0 +1,122 @@
+"""
+Compares the per-1k-row cost of building the GET /contacts/ list body.
+
+- ``response_model``: ORM objects validated and serialized by FastAPI through ``ListContactsResponse``, as the route used to.
+- ``model_dump_json``: ORM objects validated by ``ListContactsResponse`` and dumped to JSON by pydantic.
+- ``rows_orjson``: column tuples from ``get_contact_rows`` dumped by ``contacts_json``, the current list path.
+
+Each variant is timed both with the query (``query_ms``) and on already loaded data (``serialize_ms``).
+
+Usage: python -m benchmarks.bench_serialization [--url sqlite+aiosqlite://] [--sizes 100 1000] [--repeat 50]
+"""
+from datetime import date, timedelta
+from statistics import median
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.routing import serialize_response
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_response_field
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import insert
+
+from src.database.models import Base, Contacts, Users
+from src.repository.contacts import ContactsDB
+from src.services.serializers import contacts_json
+from src.schemas import ListContactsResponse
+
+
+FIELD = create_response_field(name = "list_contacts", type_ = ListContactsResponse)
+
+
+async def response_model(contacts: list[Contacts]) -> bytes:
+    content = await serialize_response(field = FIELD, response_content = {"contacts": contacts, "next_cursor": None})
+    return JSONResponse(content).body
+
+
+async def model_dump_json(contacts: list[Contacts]) -> bytes:
+    return ListContactsResponse.model_validate({"contacts": contacts, "next_cursor": None}, from_attributes = True).model_dump_json().encode()
+
+
+async def rows_orjson(rows: list) -> bytes:
+    return contacts_json(rows)
+
+
+async def end_to_end(load, serialize) -> bytes:
+    return await serialize(await load())
+
+
+async def timed(repeat: int, run) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        timings.append(time.perf_counter() - started)
+    return median(timings)
+
+
+async def bench(url: str, sizes: list[int], repeat: int) -> list[dict]:
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with session_maker() as db:
+        db.add(Users(id = 1, username = "user1", email = "user1@example.com", password = "-"))
+        await db.flush()
+        await db.execute(insert(Contacts), [{
+            "number": number,
+            "name": f"name{number}",
+            "surname": f"surname{number}",
+            "email_address": f"contact{number}@example.com",
+            "phone_number": "+01234567899",
+            "birthday": date(1950, 1, 1) + timedelta(days = number % 18000),
+            "additional_data": None if number % 2 else f"note {number}",
+            "user": 1
+        } for number in range(1, max(sizes) + 1)])
+        await db.commit()
+
+    report = []
+
+    for size in sizes:
+        async def load_objects() -> list[Contacts]:
+            async with session_maker() as db:
+                return await ContactsDB(db = db).get_contacts(user = 1, limit = size)
+
+        async def load_rows() -> list:
+            async with session_maker() as db:
+                return await ContactsDB(db = db).get_contact_rows(user = 1, limit = size)
+
+        objects, rows = await load_objects(), await load_rows()
+        scale = 1000 / size
+
+        for name, serialize, load, data in (
+            ("response_model", response_model, load_objects, objects),
+            ("model_dump_json", model_dump_json, load_objects, objects),
+            ("rows_orjson", rows_orjson, load_rows, rows),
+        ):
+            serialize_s = await timed(repeat, lambda: serialize(data))
+            query_s = await timed(repeat, lambda: end_to_end(load, serialize))
+            report.append({
+                "rows": size,
+                "variant": name,
+                "serialize_ms_per_1k": round(serialize_s * 1000 * scale, 3),
+                "query_ms_per_1k": round(query_s * 1000 * scale, 3),
+                "body_bytes": len(await serialize(data))
+            })
+
+    await engine.dispose()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default = "sqlite+aiosqlite://")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [100, 1000])
+    parser.add_argument("--repeat", type = int, default = 50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.url, args.sizes, args.repeat)), indent = 2))
@@ -0,0 +1,60 @@
+"""
+Compares the per-message cost of rendering the verification email.
+
+- ``per_send``: a new Jinja environment and template lookup for every message, as send_email used to do.
+- ``compiled``: the template compiled once and rendered by Jinja.
+- ``registry``: TemplateRegistry, which joins the precomputed static fragments.
+- ``message``: the full render_email call, including the email token and the MIME message.
+
+Usage: python -m benchmarks.bench_templates [--count 10000]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from jinja2 import Environment, FileSystemLoader
+
+from src.services.email import conf, templates, render_email
+
+
+NAME = "email_verification.html"
+
+
+def timed(count: int, render) -> dict:
+    start = time.perf_counter()
+    for n in range(count):
+        render(n)
+    elapsed = time.perf_counter() - start
+    return {"per_message_us": round(elapsed / count * 1e6, 2), "messages_per_second": round(count / elapsed)}
+
+
+def per_send(n: int) -> str:
+    template = Environment(loader=FileSystemLoader(conf.TEMPLATE_FOLDER)).get_template(NAME)
+    return template.render(username = f"user{n}", host = "http://localhost:8000/", token = "token")
+
+
+async def bench(count: int) -> dict:
+    templates.load()
+    compiled = templates.templates[NAME]
+
+    report = {
+        "per_send": timed(count, per_send),
+        "compiled": timed(count, lambda n: compiled.render(username = f"user{n}", host = "http://localhost:8000/", token = "token")),
+        "registry": timed(count, lambda n: templates.render(NAME, username = f"user{n}", host = "http://localhost:8000/", token = "token")),
+    }
+
+    start = time.perf_counter()
+    for n in range(count):
+        await render_email(f"user{n}@example.com", f"user{n}", "http://localhost:8000/")
+    elapsed = time.perf_counter() - start
+    report["message"] = {"per_message_us": round(elapsed / count * 1e6, 2), "messages_per_second": round(count / elapsed)}
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.count)), indent=2))
@@ -0,0 +1,228 @@
+"""
+Drives the running API at a fixed concurrency and reports throughput and latency percentiles per endpoint.
+
+For every size, the database is reseeded with ``--users`` confirmed users sharing ``size`` contacts, then
+each scenario sends ``--requests`` requests from ``--concurrency`` virtual clients:
+
+- ``login``: POST /api/auth/login
+- ``list``: GET /api/contacts/?limit=100
+- ``get``: GET /api/contacts/{contact_id}
+- ``birthdays``: GET /api/contacts/birthdays/7
+
+Start the server against the same database and Redis first (``python main.py``). Every request carries its own
+X-Forwarded-For address, so the per-client rate limits do not cap the measured throughput.
+
+Reads are sent with ``Cache-Control: no-cache``, which bypasses the response cache, so the scenarios measure
+the repository layer. Pass ``--cached`` to measure cache hits instead.
+
+With ``--baseline``, the run fails when a scenario's p99 is more than ``--max-regression`` above the baseline.
+
+Usage: python -m benchmarks.load_test [--base-url http://127.0.0.1:8000] [--sizes 1000 100000 1000000]
+                                      [--concurrency 32] [--requests 2000] [--output report.json]
+                                      [--baseline baseline.json] [--cached]
+"""
+from datetime import date, timedelta
+from itertools import count
+from statistics import quantiles
+import argparse
+import asyncio
+import random
+import json
+import time
+import sys
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import delete, insert, select
+import httpx
+
+from src.database.models import Base, Contacts, Users
+from src.database.migrations import upgrade
+from src.services.auth import auth_service
+from src.conf.config import settings
+
+
+PREFIX = "load_"
+PASSWORD = "load-test-password"
+BATCH = 10000
+
+
+async def seed(url: str, size: int, users: int) -> list[tuple[str, int]]:
+    """
+    Replaces the load test users and their contacts.
+
+    :return: (username, number of contacts) for every seeded user.
+    """
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(size)
+    password = await auth_service.get_password_hash(PASSWORD)
+    per_user = [size // users + (1 if n < size % users else 0) for n in range(users)]
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade)
+
+    async with session_maker() as db:
+        old = select(Users.id).where(Users.username.startswith(PREFIX))
+        await db.execute(delete(Contacts).where(Contacts.user.in_(old)))
+        await db.execute(delete(Users).where(Users.username.startswith(PREFIX)))
+
+        seeded = []
+        for n, contacts in enumerate(per_user):
+            username = f"{PREFIX}{n}"
+            user_id = (await db.execute(insert(Users).returning(Users.id), [{
+                "username": username,
+                "email": f"{username}@example.com",
+                "password": password,
+                "confirmed": True,
+                "contacts_seq": contacts,
+                "changes_seq": contacts
+            }])).scalar_one()
+
+            for offset in range(0, contacts, BATCH):
+                await db.execute(insert(Contacts), [{
+                    "user": user_id,
+                    "number": number,
+                    "change_seq": number,
+                    "name": f"name{number}",
+                    "surname": f"surname{number}",
+                    "email_address": f"contact{number}@example.com",
+                    "phone_number": f"+0{rng.randrange(10 ** 9, 10 ** 10)}",
+                    "birthday": date(1950, 1, 1) + timedelta(days = rng.randrange(365 * 50))
+                } for number in range(offset + 1, min(offset + BATCH, contacts) + 1)])
+
+            seeded.append((username, contacts))
+
+        await db.commit()
+
+    await engine.dispose()
+    return seeded
+
+
+def summary(latencies: list[float], errors: int, elapsed: float) -> dict:
+    cuts = quantiles(latencies, n = 100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+async def drive(client: httpx.AsyncClient, requests: int, concurrency: int, make_request) -> dict:
+    """
+    Sends ``requests`` requests from ``concurrency`` workers and summarizes the latencies.
+    """
+
+    issued = count()
+    latencies = []
+    errors = 0
+
+    async def worker(client_id: int) -> None:
+        nonlocal errors
+        while (n := next(issued)) < requests:
+            method, path, kwargs = make_request(client_id, n)
+            headers = {**kwargs.pop("headers", {}), "X-Forwarded-For": f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"}
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers = headers, **kwargs)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client_id) for client_id in range(concurrency)))
+    return summary(latencies, errors, time.perf_counter() - started)
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    report = []
+    limits = httpx.Limits(max_connections = args.concurrency, max_keepalive_connections = args.concurrency)
+
+    for size in args.sizes:
+        seeded = await seed(args.db_url, size, args.users)
+
+        async with httpx.AsyncClient(base_url = args.base_url, limits = limits, timeout = 60) as client:
+            tokens = []
+            for username, _ in seeded:
+                response = await client.post("/api/auth/login", data = {"username": username, "password": PASSWORD})
+                response.raise_for_status()
+                tokens.append(response.json()["access_token"])
+
+            def session(client_id: int) -> tuple[dict, int]:
+                user = client_id % len(seeded)
+                headers = {"Authorization": f"Bearer {tokens[user]}"}
+                if not args.cached:
+                    headers["Cache-Control"] = "no-cache"
+                return headers, seeded[user][1]
+
+            def login(client_id: int, n: int):
+                username = seeded[client_id % len(seeded)][0]
+                return "POST", "/api/auth/login", {"data": {"username": username, "password": PASSWORD}}
+
+            def contacts_list(client_id: int, n: int):
+                return "GET", "/api/contacts/", {"params": {"limit": 100}, "headers": session(client_id)[0]}
+
+            def contact(client_id: int, n: int):
+                headers, contacts = session(client_id)
+                return "GET", f"/api/contacts/{n % max(contacts, 1) + 1}", {"headers": headers}
+
+            def birthdays(client_id: int, n: int):
+                return "GET", "/api/contacts/birthdays/7", {"headers": session(client_id)[0]}
+
+            scenarios = {"login": login, "list": contacts_list, "get": contact, "birthdays": birthdays}
+
+            for name in args.scenarios:
+                result = await drive(client, args.requests, args.concurrency, scenarios[name])
+                report.append({"rows": size, "scenario": name, "concurrency": args.concurrency, **result})
+                print(json.dumps(report[-1]), file = sys.stderr)
+
+    return report
+
+
+def regressions(report: list[dict], baseline: list[dict], max_regression: float) -> list[str]:
+    expected = {(item["rows"], item["scenario"]): item for item in baseline}
+    failures = []
+
+    for item in report:
+        base = expected.get((item["rows"], item["scenario"]))
+        if base and item["p99_ms"] > base["p99_ms"] * (1 + max_regression):
+            failures.append(f"{item['scenario']} @ {item['rows']} rows: p99 {item['p99_ms']} ms, baseline {base['p99_ms']} ms")
+
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default = "http://127.0.0.1:8000")
+    parser.add_argument("--db-url", default = settings.sqlalchemy_database_url)
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [1000, 100000, 1000000])
+    parser.add_argument("--users", type = int, default = 10)
+    parser.add_argument("--concurrency", type = int, default = 32)
+    parser.add_argument("--requests", type = int, default = 2000)
+    parser.add_argument("--scenarios", nargs = "+", default = ["login", "list", "get", "birthdays"],
+                        choices = ["login", "list", "get", "birthdays"])
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--max-regression", type = float, default = 0.2)
+    parser.add_argument("--cached", action = "store_true", help = "let reads hit the response cache")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent = 2)
+    print(output)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            failures = regressions(report, json.load(file), args.max_regression)
+        for failure in failures:
+            print(f"regression: {failure}", file = sys.stderr)
+        sys.exit(1 if failures else 0)
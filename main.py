@@ -1,12 +1,23 @@
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from fastapi_limiter import FastAPILimiter
 from fastapi import FastAPI
 import redis.asyncio as redis
+import asyncio
 import uvicorn
+import os
 
-from src.routes import auth, contacts, users
+from src.routes import auth, contacts, users, metrics
 from src.conf.config import settings
+from src.services.email import mail_queue, smtp_pool, templates
+from src.services.cache import principal_cache
+from src.services.avatars import avatar_jobs
+from src.services.response_cache import response_cache
+from src.services.metrics import MetricsMiddleware, rate_limit_callback
+from src.services.queries import QueryCounterMiddleware
+from src.services.auth import auth_service
+from src.database.db import init_models
 
 
 @asynccontextmanager
@@ -17,12 +28,22 @@ async def lifespan(app: FastAPI):
     :param app: FastAPI application instance.
     :type app: FastAPI
     """
+    await init_models()
+    templates.load()
     r = await redis.Redis(
         host = settings.redis_host,
         port = settings.redis_port
     )
-    await FastAPILimiter.init(r)
+    await FastAPILimiter.init(r, http_callback=rate_limit_callback)
+    await principal_cache.init(r)
+    principal_listener = asyncio.create_task(principal_cache.listen())
+    await mail_queue.init(r)
+    await avatar_jobs.init(r)
+    await response_cache.init(r)
     yield
+    principal_listener.cancel()
+    auth_service.hasher.shutdown()
+    await smtp_pool.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -33,6 +54,8 @@ origins = [
     ]
 
 
+app.add_middleware(QueryCounterMiddleware, debug=settings.debug, n_plus_one_threshold=settings.n_plus_one_threshold)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -44,6 +67,11 @@ app.add_middleware(
 app.include_router(contacts.router, prefix='/api')
 app.include_router(auth.router, prefix='/api')
 app.include_router(users.router, prefix='/api')
+app.include_router(metrics.router)
+
+if settings.avatar_storage == 'local':
+    os.makedirs(settings.avatar_local_dir, exist_ok=True)
+    app.mount(settings.avatar_local_url, StaticFiles(directory=settings.avatar_local_dir), name='avatars')
 
 
 @app.get("/")
@@ -2,6 +2,23 @@ import unittest
 
 from tests.repository.test_contacts import TestContactsDB
 from tests.repository.test_users import TestUsersDB
+from tests.database.test_migrations import TestMigrations
+from tests.database.test_query_plans import TestQueryPlans
+from tests.database.test_pool import TestMeteredQueuePool
+from tests.database.test_routing import TestRoutingSession
+from tests.database.test_contact_writes import TestContactWrites
+from tests.services.test_hashing import TestPasswordHasher
+from tests.services.test_cache import TestLRUCache, TestPrincipalCache
+from tests.services.test_contacts_io import TestContactsIO, TestWriteContacts
+from tests.services.test_email import TestSMTPPool, TestMailWorker, TestMailQueue
+from tests.services.test_templates import TestTemplateRegistry
+from tests.services.test_avatars import TestAvatars
+from tests.services.test_gravatar import TestGravatar
+from tests.services.test_auth import TestTokenCache
+from tests.services.test_metrics import TestMetrics
+from tests.services.test_queries import TestQueryCounter
+from tests.services.test_response_cache import TestResponseCache
+from tests.services.test_serializers import TestSerializers
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -2,28 +2,63 @@ from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
+    debug: bool = False
+    n_plus_one_threshold: int = 5
+
     sqlalchemy_database_url: str
+    sqlalchemy_replica_urls: list[str] = []
     postgres_db: str
     postgres_user: str
     postgres_password: str
     postgres_port: int
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout: int = 30000
     
     secret_key: str
     algorithm: str
+    password_hash_workers: int = 4
+    jwt_cache_size: int = 4096
+
+    import_batch_size: int = 1000
+    import_max_errors: int = 1000
+    batch_max_items: int = 1000
     
     mail_username: str
     mail_password: str
     mail_from: str
     mail_port: int
     mail_server: str
+    mail_pool_size: int = 2
+    mail_batch_size: int = 50
+    mail_max_attempts: int = 5
+    mail_retry_backoff: float = 2.0
+    mail_visibility_timeout: float = 300.0
     
     redis_host: str = 'localhost'
     redis_port: int = 6379
+
+    principal_cache_size: int = 1024
+    principal_cache_ttl: int = 300
+    principal_cache_local_ttl: int = 30
+    response_cache_ttl: int = 300
+    response_cache_replica_ttl: int = 5
     
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
 
+    avatar_storage: str = 'cloudinary'
+    avatar_local_dir: str = 'avatars'
+    avatar_local_url: str = '/avatars'
+    avatar_size: int = 250
+    avatar_max_bytes: int = 10 * 1024 * 1024
+    avatar_job_ttl: int = 3600
+    avatar_job_local_size: int = 1024
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
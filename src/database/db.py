@@ -1,18 +1,65 @@
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.engine import make_url
 
+from src.database.routing import RoutingSession
+from src.database.pool import MeteredQueuePool
+from src.services.metrics import instrument_engine
 from src.conf.config import settings
+from src.database.migrations import upgrade
 from src.database.models import Base
 
 
-engine = create_engine(settings.sqlalchemy_database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def engine_options(url: str) -> dict:
+    """
+    Builds the engine pool options from the settings.
 
-Base.metadata.create_all(bind=engine)
+    The statement timeout is sent as a Postgres server setting, so it only applies to asyncpg connections.
 
-def get_db():
-    db = SessionLocal()
-    try:
+    :param url: Database URL.
+    :type url: str
+    :return: Keyword arguments for ``create_async_engine``.
+    :rtype: dict
+    """
+
+    options = {
+        "poolclass": MeteredQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+    if make_url(url).get_backend_name() == "postgresql" and settings.db_statement_timeout:
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.db_statement_timeout)}}
+
+    return options
+
+
+engine = create_async_engine(settings.sqlalchemy_database_url, **engine_options(settings.sqlalchemy_database_url))
+replica_engines = [create_async_engine(url, **engine_options(url)) for url in settings.sqlalchemy_replica_urls]
+for instrumented in [engine, *replica_engines]:
+    instrument_engine(instrumented.sync_engine)
+
+SessionLocal = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=[replica.sync_engine for replica in replica_engines],
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def init_models() -> None:
+    """
+    Creates database tables that do not exist yet and applies pending migrations.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade)
+
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,238 @@
+from datetime import datetime, UTC
+from typing import Callable
+
+from sqlalchemy import Column, Connection, DateTime, Integer, MetaData, Table, inspect, insert, select, text, update
+from sqlalchemy.schema import CreateIndex
+
+from src.database.models import Contacts, Users, TOMBSTONE, utcnow
+
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("applied_at", DateTime),
+)
+
+
+def create_index(conn: Connection, table: Table, name: str) -> None:
+    """
+    Creates an index declared on a model table unless it already exists.
+
+    :param conn: Database connection.
+    :type conn: Connection
+    :param table: Table that declares the index.
+    :type table: Table
+    :param name: Name of the index.
+    :type name: str
+    """
+
+    index = next(idx for idx in table.indexes if idx.name == name)
+    conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def columns(conn: Connection, table: str) -> set[str]:
+    """
+    Returns the names of the columns that currently exist in a table.
+
+    :param conn: Database connection.
+    :type conn: Connection
+    :param table: Table name.
+    :type table: str
+    :return: Column names.
+    :rtype: set[str]
+    """
+
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def contact_numbers(conn: Connection) -> None:
+    """
+    Adds a per-user contact number covered by a unique ``(user, number)`` index.
+
+    Existing contacts are numbered by their position in the user's contacts ordered by id,
+    which is exactly what the old offset based lookup exposed to clients.
+
+    :param conn: Database connection.
+    :type conn: Connection
+    """
+
+    if "number" not in columns(conn, "contacts"):
+        conn.execute(text("ALTER TABLE contacts ADD COLUMN number INTEGER"))
+
+    if "contacts_seq" not in columns(conn, "users"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN contacts_seq INTEGER NOT NULL DEFAULT 0"))
+
+    conn.execute(text("""
+        UPDATE contacts SET number = numbered.position
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY "user" ORDER BY id) AS position
+            FROM contacts
+        ) AS numbered
+        WHERE contacts.id = numbered.id AND contacts.number IS NULL
+    """))
+    conn.execute(text("""
+        UPDATE users SET contacts_seq = (
+            SELECT COALESCE(MAX(number), 0) FROM contacts WHERE contacts."user" = users.id
+        )
+    """))
+
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE contacts ALTER COLUMN number SET NOT NULL"))
+
+    create_index(conn, Contacts.__table__, "ix_contacts_user_number")
+
+
+def birthday_index(conn: Connection) -> None:
+    """
+    Adds the ``(user, month * 100 + day)`` expression index used by upcoming-birthday lookups.
+
+    :param conn: Database connection.
+    :type conn: Connection
+    """
+
+    create_index(conn, Contacts.__table__, "ix_contacts_user_birthday_key")
+
+
+def lookup_indexes(conn: Connection) -> None:
+    """
+    Adds composite indexes for contact filters and unique indexes for user lookups.
+
+    Creating the unique indexes fails if the table already holds duplicate emails or usernames;
+    those rows have to be merged by hand before upgrading.
+
+    :param conn: Database connection.
+    :type conn: Connection
+    """
+
+    create_index(conn, Contacts.__table__, "ix_contacts_user_surname_name")
+    create_index(conn, Contacts.__table__, "ix_contacts_user_email_address")
+    create_index(conn, Users.__table__, "ix_users_email")
+    create_index(conn, Users.__table__, "ix_users_username")
+
+
+def contact_search(conn: Connection) -> None:
+    """
+    Adds the Postgres full-text and trigram indexes used by contact search.
+
+    ``search_vector`` is a generated tsvector over name, surname and email address; it is not mapped
+    on the model, so other databases simply skip this migration and search with ``LIKE``.
+
+    :param conn: Database connection.
+    :type conn: Connection
+    """
+
+    if conn.dialect.name != "postgresql":
+        return
+
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text("""
+        ALTER TABLE contacts ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(surname, '') || ' ' || coalesce(email_address, ''))
+        ) STORED
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_contacts_search_vector ON contacts USING gin (search_vector)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_contacts_full_name_trgm ON contacts "
+        "USING gin (lower(name || ' ' || surname) gin_trgm_ops)"
+    ))
+
+
+def contact_changes(conn: Connection) -> None:
+    """
+    Adds the ``updated_at`` and ``deleted_at`` columns and the ``(user, updated_at, id)`` index used by delta sync.
+
+    Existing contacts get the upgrade time as ``updated_at``, so the first sync after upgrading returns all of them.
+
+    :param conn: Database connection.
+    :type conn: Connection
+    """
+
+    existing = columns(conn, "contacts")
+
+    if "updated_at" not in existing:
+        conn.execute(text(f"ALTER TABLE contacts ADD COLUMN updated_at {DateTime().compile(dialect=conn.dialect)}"))
+
+    if "deleted_at" not in existing:
+        conn.execute(text(f"ALTER TABLE contacts ADD COLUMN deleted_at {DateTime().compile(dialect=conn.dialect)}"))
+
+    conn.execute(update(Contacts.__table__).where(Contacts.updated_at.is_(None)).values(updated_at = utcnow()))
+
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE contacts ALTER COLUMN updated_at SET NOT NULL"))
+
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_contacts_user_updated_at ON contacts ("user", updated_at, id)'))
+
+
+def contact_change_seq(conn: Connection) -> None:
+    """
+    Adds the per-user change sequence that orders delta sync, and blanks the personal data of tombstones.
+
+    Existing contacts are numbered in ``(updated_at, id)`` order, which is what the sync cursor followed before,
+    and the ``(user, updated_at, id)`` index it used is dropped.
+
+    :param conn: Database connection.
+    :type conn: Connection
+    """
+
+    if "change_seq" not in columns(conn, "contacts"):
+        conn.execute(text("ALTER TABLE contacts ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"))
+
+    if "changes_seq" not in columns(conn, "users"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN changes_seq INTEGER NOT NULL DEFAULT 0"))
+
+    conn.execute(text("""
+        UPDATE contacts SET change_seq = numbered.position
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY "user" ORDER BY updated_at, id) AS position
+            FROM contacts
+        ) AS numbered
+        WHERE contacts.id = numbered.id AND contacts.change_seq = 0
+    """))
+    conn.execute(text("""
+        UPDATE users SET changes_seq = (
+            SELECT COALESCE(MAX(change_seq), 0) FROM contacts WHERE contacts."user" = users.id
+        )
+    """))
+    conn.execute(update(Contacts.__table__).where(Contacts.deleted_at.is_not(None)).values(**TOMBSTONE))
+
+    conn.execute(text("DROP INDEX IF EXISTS ix_contacts_user_updated_at"))
+    create_index(conn, Contacts.__table__, "ix_contacts_user_change_seq")
+
+
+MIGRATIONS: list[tuple[int, Callable[[Connection], None]]] = [
+    (1, contact_numbers),
+    (2, birthday_index),
+    (3, lookup_indexes),
+    (4, contact_search),
+    (5, contact_changes),
+    (6, contact_change_seq),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    """
+    Applies every migration that has not been recorded in ``schema_migrations`` yet.
+
+    Migrations are idempotent, so a database freshly built by ``create_all`` only gets them recorded.
+    On Postgres the statement timeout is lifted for the migration transaction, since backfills and index
+    builds on a large ``contacts`` table can run longer than the timeout set for request queries.
+
+    :param conn: Database connection.
+    :type conn: Connection
+    """
+
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))"))
+
+    schema_migrations.create(conn, checkfirst=True)
+    applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    for version, migration in MIGRATIONS:
+        if version not in applied:
+            migration(conn)
+            conn.execute(insert(schema_migrations).values(version = version, applied_at = datetime.now(UTC)))
@@ -1,13 +1,41 @@
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped
-from sqlalchemy import Date, DateTime, ForeignKey
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy import Date, DateTime, ForeignKey, Index, extract, literal_column
+from datetime import datetime, UTC
+
+
+def utcnow() -> datetime:
+    """
+    Current UTC time without tzinfo, as stored in ``DateTime`` columns.
+    """
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+# Values written over a deleted contact, so its tombstone keeps no personal data.
+TOMBSTONE = {
+    "name": "",
+    "surname": "",
+    "email_address": "",
+    "phone_number": "",
+    "birthday": None,
+    "additional_data": None,
+}
+
 
 class Base(DeclarativeBase):
     pass
 
 class Contacts(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_user_number", "user", "number", unique=True),
+        Index("ix_contacts_user_surname_name", "user", "surname", "name"),
+        Index("ix_contacts_user_email_address", "user", "email_address"),
+        Index("ix_contacts_user_change_seq", "user", "change_seq"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True, autoincrement="auto")
+    number: Mapped[int]
     name: Mapped[str]
     surname: Mapped[str]
     email_address: Mapped[str]
@@ -15,9 +43,31 @@ class Contacts(Base):
     birthday = mapped_column(Date)
     additional_data: Mapped[str] = mapped_column(nullable=True)
     user: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    updated_at = mapped_column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    deleted_at = mapped_column(DateTime, nullable=True)
+    change_seq: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    @hybrid_property
+    def birthday_key(self) -> int:
+        """
+        Birthday as ``month * 100 + day``, a day-of-year ordering that does not depend on leap years.
+        """
+        return self.birthday.month * 100 + self.birthday.day
+
+    @birthday_key.inplace.expression
+    @classmethod
+    def _birthday_key_expression(cls):
+        return extract("month", cls.birthday) * literal_column("100") + extract("day", cls.birthday)
+
+
+Index("ix_contacts_user_birthday_key", Contacts.user, Contacts.birthday_key)
 
 class Users(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_email", "email", unique=True),
+        Index("ix_users_username", "username", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True, autoincrement="auto")
     username: Mapped[str]
@@ -28,3 +78,5 @@ class Users(Base):
     created_at = mapped_column(DateTime)
     refresh_token: Mapped[str] = mapped_column(nullable=True)
     confirmed: Mapped[bool] = mapped_column(default=False)
+    contacts_seq: Mapped[int] = mapped_column(default=0, server_default="0")
+    changes_seq: Mapped[int] = mapped_column(default=0, server_default="0")
@@ -0,0 +1,56 @@
+from time import perf_counter
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from sqlalchemy import exc
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records checkout latency, waits for a free connection and timeouts.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.checkout_seconds = 0.0
+        self.checkout_seconds_max = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        if self._max_overflow > -1 and self._overflow >= self._max_overflow and self._pool.empty():
+            self.waits += 1
+
+        start = perf_counter()
+
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = perf_counter() - start
+            self.checkouts += 1
+            self.checkout_seconds += elapsed
+            self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+
+    def stats(self) -> dict:
+        """
+        Returns the pool counters.
+
+        :return: Pool size, connections in use and checkout counters.
+        :rtype: dict
+        """
+
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "in_use": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": self.overflow(),
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "checkout_seconds": round(self.checkout_seconds, 6),
+            "checkout_seconds_max": round(self.checkout_seconds_max, 6),
+        }
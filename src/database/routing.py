@@ -0,0 +1,113 @@
+from typing import Any, Callable
+from functools import wraps
+import inspect
+import random
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+class RoutingSession(Session):
+    """
+    Session that sends statements of read-only repository methods to a replica.
+
+    Each session picks one replica. Everything else goes to the primary, and once the session has flushed
+    or committed, or has entered a method marked with ``writes``, it stays on the primary so the rest of the
+    request reads its own writes.
+    """
+
+    def __init__(self, *args, replicas: list[Engine] | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.replica = random.choice(replicas) if replicas else None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        if (
+            self.replica is not None
+            and self.info.get("read_only")
+            and not self.info.get("primary")
+            and not self._flushing
+        ):
+            return self.replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+@event.listens_for(RoutingSession, "after_commit")
+def stick_to_primary(session: Session, *args) -> None:
+    session.info["primary"] = True
+
+
+def use_primary(db: AsyncSession) -> None:
+    """
+    Pins a session to the primary, for reads that are followed by a write in the same request.
+
+    :param db: Database session.
+    :type db: AsyncSession
+    """
+
+    db.info["primary"] = True
+
+
+def on_replica(db: AsyncSession) -> bool:
+    """
+    Tells whether the read-only queries of a session are served by a replica, which may lag behind the primary.
+
+    :param db: Database session.
+    :type db: AsyncSession
+    :return: True if the session reads from a replica.
+    :rtype: bool
+    """
+
+    return getattr(db.sync_session, "replica", None) is not None and not db.info.get("primary")
+
+
+def read_only(method: Callable) -> Callable:
+    """
+    Marks a repository method whose queries may be served by a replica.
+
+    :param method: Repository method using ``self.db``.
+    :type method: Callable
+    :return: Wrapped method.
+    :rtype: Callable
+    """
+
+    if inspect.isasyncgenfunction(method):
+        @wraps(method)
+        async def generator(self, *args, **kwargs) -> Any:
+            info = self.db.info
+            info["read_only"] = info.get("read_only", 0) + 1
+            try:
+                async for item in method(self, *args, **kwargs):
+                    yield item
+            finally:
+                info["read_only"] -= 1
+        return generator
+
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs) -> Any:
+        info = self.db.info
+        info["read_only"] = info.get("read_only", 0) + 1
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            info["read_only"] -= 1
+    return wrapper
+
+
+def writes(method: Callable) -> Callable:
+    """
+    Marks a repository method that writes, pinning the session to the primary before it runs,
+    so the rows it reads first are the ones it then modifies.
+
+    :param method: Repository method using ``self.db``.
+    :type method: Callable
+    :return: Wrapped method.
+    :rtype: Callable
+    """
+
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs) -> Any:
+        use_primary(self.db)
+        return await method(self, *args, **kwargs)
+    return wrapper
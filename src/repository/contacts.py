@@ -1,53 +1,82 @@
-from sqlalchemy.orm import Session, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, Select, select, insert, update, or_, func, literal_column
+from datetime import date, timedelta
+from typing import AsyncIterator
+from calendar import isleap
+import re
 
-from src.database.models import Contacts, Users
-from src.schemas import ContactModel
+from src.database.routing import read_only, writes
+from src.services.metrics import instrument_repository
+from src.services.response_cache import response_cache
+from src.database.models import Contacts, Users, TOMBSTONE, utcnow
+from src.schemas import ContactModel, ContactResponse, ContactsBatch
 
 
+@instrument_repository
 class ContactsDB:
     """
     Handles database operations related to contacts.
     """
 
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: AsyncSession) -> None:
         self.db = db
 
-    async def get_contacts_objects(self) -> Query[Contacts]:
+    async def get_contacts_objects(self) -> Select[tuple[Contacts]]:
         """
-        Retrieves all contacts from the database.
+        Builds a select statement for all contacts in the database that are not deleted.
 
-        :return: Query object for contacts.
-        :rtype: Query[Contacts]
+        :return: Select statement for contacts.
+        :rtype: Select[tuple[Contacts]]
         """
-        return self.db.query(Contacts)
+        return select(Contacts).where(Contacts.deleted_at.is_(None))
     
-    async def filter_objects(self, objects: Query[Contacts], **kwargs) -> Query[Contacts]:
+    async def filter_objects(self, objects: Select[tuple[Contacts]], **kwargs) -> Select[tuple[Contacts]]:
         """
-        Filters Query objects based on provided key-value pairs.
+        Filters a select statement based on provided key-value pairs.
 
-        :param objects: Query objects to filter.
-        :type objects: Query[Contacts]
+        :param objects: Select statement to filter.
+        :type objects: Select[tuple[Contacts]]
         :param kwargs: Key-value pairs for filtering.
         :type kwargs: dict
-        :return: Filtered Query objects.
-        :rtype: Query[Contacts]
+        :return: Filtered select statement.
+        :rtype: Select[tuple[Contacts]]
         """
         for key, value in kwargs.items():
             if value:
                 try:
-                    objects = objects.filter(getattr(Contacts, key) == value)
+                    objects = objects.where(getattr(Contacts, key) == value)
                 except AttributeError:
                     pass
         return objects
 
-    async def get_contacts(self, **kwargs) -> list[Contacts]:
+    async def paginate(self, objects: Select[tuple[Contacts]], cursor: int | None = None, limit: int | None = None) -> Select[tuple[Contacts]]:
         """
-        Retrieves contacts based on provided filters.
+        Orders a select statement by contact number and applies keyset pagination.
+
+        :param objects: Select statement to paginate.
+        :type objects: Select[tuple[Contacts]]
+        :param cursor: Number of the last contact already returned.
+        :type cursor: int | None
+        :param limit: Maximum number of contacts to return.
+        :type limit: int | None
+        :return: Paginated select statement.
+        :rtype: Select[tuple[Contacts]]
+        """
+        if cursor:
+            objects = objects.where(Contacts.number > cursor)
+        objects = objects.order_by(Contacts.number)
+        if limit:
+            objects = objects.limit(limit)
+        return objects
 
-        :param kwargs: Filtering criteria.
+    async def get_contacts_statement(self, **kwargs) -> Select[tuple[Contacts]]:
+        """
+        Builds a filtered and paginated select statement for contacts.
+
+        :param kwargs: Filtering criteria, ``cursor`` and ``limit``.
         :type kwargs: dict
-        :return: List of filtered contacts.
-        :rtype: list[Contacts]
+        :return: Select statement for contacts.
+        :rtype: Select[tuple[Contacts]]
         """
         contacts = await self.get_contacts_objects()
         filtered_contacts = await self.filter_objects(
@@ -57,23 +86,244 @@ class ContactsDB:
             email_address = kwargs.get("email_address"),
             user = kwargs.get("user")
         )
-        return filtered_contacts.all()
+        return await self.paginate(filtered_contacts, kwargs.get("cursor"), kwargs.get("limit"))
+
+    @read_only
+    async def get_contacts(self, **kwargs) -> list[Contacts]:
+        """
+        Retrieves contacts based on provided filters.
+
+        :param kwargs: Filtering criteria, ``cursor`` and ``limit``.
+        :type kwargs: dict
+        :return: List of filtered contacts.
+        :rtype: list[Contacts]
+        """
+        contacts = await self.get_contacts_statement(**kwargs)
+        result = await self.db.execute(contacts)
+        return list(result.scalars().all())
+
+    @read_only
+    async def get_contact_rows(self, **kwargs) -> list[Row]:
+        """
+        Retrieves contacts based on provided filters as plain column tuples in ``ContactResponse`` field order.
+
+        No ORM objects are built or added to the identity map, which makes this the cheap path for read-only lists.
+
+        :param kwargs: Filtering criteria, ``cursor`` and ``limit``.
+        :type kwargs: dict
+        :return: List of contact rows.
+        :rtype: list[Row]
+        """
+        contacts = await self.get_contacts_statement(**kwargs)
+        columns = [getattr(Contacts, field) for field in ContactResponse.model_fields]
+        result = await self.db.execute(contacts.with_only_columns(*columns))
+        return list(result.all())
+
+    @read_only
+    async def stream_contacts(self, **kwargs) -> AsyncIterator[Contacts]:
+        """
+        Yields contacts based on provided filters from a server-side cursor.
+
+        :param kwargs: Filtering criteria, ``cursor`` and ``limit``.
+        :type kwargs: dict
+        :return: Async iterator over filtered contacts.
+        :rtype: AsyncIterator[Contacts]
+        """
+        contacts = await self.get_contacts_statement(**kwargs)
+        result = await self.db.stream_scalars(contacts.execution_options(yield_per = 500))
+        async for contact in result:
+            yield contact
+
+    async def search_terms(self, q: str) -> list[str]:
+        """
+        Splits a search string into lowercase word terms.
+
+        :param q: Search string.
+        :type q: str
+        :return: Up to eight word terms.
+        :rtype: list[str]
+        """
+        return re.findall(r"\w+", q.lower())[:8]
 
+    @read_only
+    async def search_contacts(self, user: Users, q: str, offset: int = 0, limit: int = 100) -> list[Contacts]:
+        """
+        Searches the user's contacts by prefixes of their name, surname and email address.
+
+        On Postgres the search uses the ``search_vector`` tsvector column and a trigram index on the full name,
+        ranking matches by relevance. Other databases fall back to ``LIKE 'term%'`` matching.
+
+        :param user: User object.
+        :type user: Users
+        :param q: Search string.
+        :type q: str
+        :param offset: Number of ranked matches to skip.
+        :type offset: int
+        :param limit: Maximum number of contacts to return.
+        :type limit: int
+        :return: List of matching contacts, best matches first.
+        :rtype: list[Contacts]
+        """
+        terms = await self.search_terms(q)
+
+        if not terms:
+            return []
+
+        contacts = await self.get_contacts_objects()
+        contacts = contacts.where(Contacts.user == user.id)
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            search_vector = literal_column("contacts.search_vector")
+            query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+            full_name = func.lower(Contacts.name + literal_column("' '") + Contacts.surname)
+            phrase = " ".join(terms)
+            contacts = contacts.where(or_(search_vector.op("@@")(query), full_name.op("%")(phrase))).order_by(
+                func.greatest(func.ts_rank(search_vector, query), func.similarity(full_name, phrase)).desc(),
+                Contacts.number
+            )
+        else:
+            for term in terms:
+                pattern = term.replace("_", "\\_") + "%"
+                contacts = contacts.where(or_(
+                    Contacts.name.ilike(pattern, escape = "\\"),
+                    Contacts.surname.ilike(pattern, escape = "\\"),
+                    Contacts.email_address.ilike(pattern, escape = "\\")
+                ))
+            contacts = contacts.order_by(Contacts.surname, Contacts.name, Contacts.number)
+
+        result = await self.db.execute(contacts.offset(offset).limit(limit))
+        return list(result.scalars().all())
+
+    @read_only
     async def get_contact(self, user: Users, contact_id: int) -> Contacts|None:
         """
         Retrieves a specific contact belonging to a user.
 
         :param user: User object.
         :type user: Users
-        :param contact_id: ID of the contact.
+        :param contact_id: Per-user number of the contact.
         :type contact_id: int
         :return: Contact object if found, otherwise None.
         :rtype: Contacts | None
         """
         contacts = await self.get_contacts_objects()
-        contact = await self.filter_objects(contacts, user = user.id)
-        return contact.order_by(Contacts.id).offset(contact_id - 1).first()
+        contact = contacts.where(Contacts.user == user.id, Contacts.number == contact_id)
+        result = await self.db.execute(contact)
+        return result.scalars().first()
+
+    @read_only
+    async def get_changes(self, user: Users, since: int = 0, limit: int = 100) -> list[Contacts]:
+        """
+        Retrieves the user's contacts created, updated or deleted after a sync position, oldest change first.
+
+        Deleted contacts are returned as tombstones with ``deleted_at`` set and personal data blanked.
+        Changes are ordered by ``change_seq``, which is served by the ``(user, change_seq)`` index.
+
+        :param user: User object.
+        :type user: Users
+        :param since: ``change_seq`` of the last change already synced, or 0 for all contacts.
+        :type since: int
+        :param limit: Maximum number of contacts to return.
+        :type limit: int
+        :return: List of changed contacts.
+        :rtype: list[Contacts]
+        """
+        contacts = select(Contacts).where(Contacts.user == user.id, Contacts.change_seq > since)
+        result = await self.db.execute(contacts.order_by(Contacts.change_seq).limit(limit))
+        return list(result.scalars().all())
+
+    async def birthday_ranges(self, start_day: date, days_to_birthday: int) -> list[tuple[int, int]]:
+        """
+        Splits a date window into inclusive ranges of ``Contacts.birthday_key`` values.
+
+        A window crossing new year yields two ranges. In a non-leap year a range ending on
+        February 28 is extended to February 29, so those birthdays are celebrated on the 28th.
+
+        :param start_day: First day of the window.
+        :type start_day: date
+        :param days_to_birthday: Number of days after the first day to include.
+        :type days_to_birthday: int
+        :return: List of (low, high) birthday keys.
+        :rtype: list[tuple[int, int]]
+        """
+
+        if days_to_birthday < 0:
+            return []
+        if days_to_birthday >= 365:
+            return [(101, 1231)]
+
+        end_day = start_day + timedelta(days = days_to_birthday)
+        
+        if start_day.year == end_day.year:
+            segments = [(start_day, end_day)]
+        else:
+            segments = [(start_day, date(start_day.year, 12, 31)), (date(end_day.year, 1, 1), end_day)]
+
+        ranges = []
+
+        for low, high in segments:
+            high_key = high.month * 100 + high.day
+            if high_key == 228 and not isleap(high.year):
+                high_key = 229
+            ranges.append((low.month * 100 + low.day, high_key))
+
+        return ranges
+
+    @read_only
+    async def get_contacts_by_birthday(self, user: Users, start_day: date, days_to_birthday: int) -> list[Contacts]:
+        """
+        Retrieves the user's contacts whose birthdays fall within the given number of days from the start day.
 
+        :param user: User object.
+        :type user: Users
+        :param start_day: First day of the window.
+        :type start_day: date
+        :param days_to_birthday: Number of days after the first day to include.
+        :type days_to_birthday: int
+        :return: List of contacts with birthdays within the window.
+        :rtype: list[Contacts]
+        """
+
+        ranges = await self.birthday_ranges(start_day, days_to_birthday)
+
+        if not ranges:
+            return []
+
+        contacts = await self.get_contacts_objects()
+        contacts = contacts.where(
+            Contacts.user == user.id,
+            or_(*[Contacts.birthday_key.between(low, high) for low, high in ranges])
+        )
+        result = await self.db.execute(contacts.order_by(Contacts.number))
+        return list(result.scalars().all())
+
+    async def reserve(self, user_id: int, contacts: int = 0, changes: int = 0) -> tuple[int, int]:
+        """
+        Advances the user's contact number and change sequence counters, without committing.
+
+        The UPDATE holds the user's row lock until the transaction ends, so writes of one user are serialized
+        and ``change_seq`` values become visible in the order they were handed out.
+
+        :param user_id: User id.
+        :type user_id: int
+        :param contacts: Number of contact numbers to reserve.
+        :type contacts: int
+        :param changes: Number of change sequence values to reserve.
+        :type changes: int
+        :return: Last reserved contact number and change sequence value.
+        :rtype: tuple[int, int]
+        """
+        result = await self.db.execute(
+            update(Users)
+            .where(Users.id == user_id)
+            .values(contacts_seq = Users.contacts_seq + contacts, changes_seq = Users.changes_seq + changes)
+            .returning(Users.contacts_seq, Users.changes_seq)
+            .execution_options(synchronize_session = False)
+        )
+        number, change = result.one()
+        return number, change
+
+    @writes
     async def create_contact(self, user: Users, contact: ContactModel) -> Contacts:
         """
         Creates a new contact for a user.
@@ -85,7 +335,11 @@ class ContactsDB:
         :return: Newly created contact object.
         :rtype: Contacts
         """
+        number, change = await self.reserve(user.id, contacts = 1, changes = 1)
+
         new_contact = Contacts(
+        number = number,
+        change_seq = change,
         name = contact.name,
         surname = contact.surname,
         email_address = contact.email_address,
@@ -96,21 +350,182 @@ class ContactsDB:
         )
     
         self.db.add(new_contact)
-        self.db.commit()
-        self.db.refresh(new_contact)
+        await self.db.commit()
+        await response_cache.bump(user.id)
+        await self.db.refresh(new_contact)
         return new_contact
 
-    async def update_contact(self, contact: ContactModel, contact_obj: Contacts) -> Contacts:
+    @writes
+    async def create_contacts(self, user: Users, contacts: list[ContactModel]) -> int:
+        """
+        Creates many contacts for a user with one multi-row insert in a single transaction.
+
+        :param user: User object.
+        :type user: Users
+        :param contacts: Contacts data.
+        :type contacts: list[ContactModel]
+        :return: Number of created contacts.
+        :rtype: int
+        """
+        if not contacts:
+            return 0
+
+        await self.insert_contacts(user, contacts)
+        await self.db.commit()
+        await response_cache.bump(user.id)
+        return len(contacts)
+
+    async def insert_contacts(self, user: Users, contacts: list[ContactModel]) -> int:
+        """
+        Reserves numbers for new contacts and inserts them with one multi-row insert, without committing.
+
+        :param user: User object.
+        :type user: Users
+        :param contacts: Contacts data.
+        :type contacts: list[ContactModel]
+        :return: Number of the first inserted contact; the rest follow in order.
+        :rtype: int
+        """
+        number, change = await self.reserve(user.id, contacts = len(contacts), changes = len(contacts))
+        first_number = number - len(contacts) + 1
+
+        await self.insert_rows(user, contacts, first_number, change - len(contacts) + 1)
+        return first_number
+
+    async def insert_rows(self, user: Users, contacts: list[ContactModel], first_number: int, first_change: int) -> None:
+        """
+        Inserts new contacts with already reserved numbers and change sequence values, without committing.
+
+        :param user: User object.
+        :type user: Users
+        :param contacts: Contacts data.
+        :type contacts: list[ContactModel]
+        :param first_number: Number of the first contact; the rest follow in order.
+        :type first_number: int
+        :param first_change: Change sequence value of the first contact; the rest follow in order.
+        :type first_change: int
+        """
+        await self.db.execute(insert(Contacts), [
+            {
+                "number": first_number + index,
+                "change_seq": first_change + index,
+                "name": contact.name,
+                "surname": contact.surname,
+                "email_address": contact.email_address,
+                "phone_number": contact.phone_number,
+                "birthday": contact.birthday,
+                "additional_data": contact.additional_data,
+                "user": user.id
+            }
+            for index, contact in enumerate(contacts)
+        ])
+
+    @writes
+    async def apply_batch(self, user: Users, batch: ContactsBatch) -> dict[str, list[dict]]:
+        """
+        Applies many creates, updates and deletes of the user's contacts in a single transaction.
+
+        Contact numbers and one ``change_seq`` per item are reserved first with one UPDATE of the user row,
+        whose lock keeps concurrent writes from deleting the contacts while the batch applies. Items that turn
+        out not to exist leave their ``change_seq`` unused, which sync does not mind as long as it grows.
+
+        Upserts without a number are inserted with one multi-row insert. The numbers of the other items are
+        mapped to ids with one select, then updates and deletes run as bulk UPDATEs by primary key; deletes
+        mark the contacts as deleted and blank their personal data.
+
+        :param user: User object.
+        :type user: Users
+        :param batch: Upserts and numbers of contacts to delete.
+        :type batch: ContactsBatch
+        :return: Per-item results for ``upserts`` and ``deletes``, in request order.
+        :rtype: dict[str, list[dict]]
+        """
+        created = [upsert for upsert in batch.upserts if upsert.number is None]
+        reserved = len(batch.upserts) + len(batch.deletes)
+
+        if reserved:
+            number, change = await self.reserve(user.id, contacts = len(created), changes = reserved)
+            next_number = number - len(created) + 1
+            next_change = change - reserved + 1
+
+        numbers = [upsert.number for upsert in batch.upserts if upsert.number is not None] + batch.deletes
+        ids = {}
+
+        if numbers:
+            result = await self.db.execute(
+                select(Contacts.number, Contacts.id)
+                .where(Contacts.user == user.id, Contacts.number.in_(numbers), Contacts.deleted_at.is_(None))
+            )
+            ids = dict(result.all())
+
+        deleted = [ids[number] for number in batch.deletes if number in ids]
+
+        if created:
+            await self.insert_rows(user, created, next_number, next_change)
+            next_change += len(created)
+
+        now = utcnow()
+        updates = []
+        upserts = []
+
+        for upsert in batch.upserts:
+            if upsert.number is None:
+                upserts.append({"number": next_number, "status": "created"})
+                next_number += 1
+            elif upsert.number in ids:
+                updates.append({
+                    "id": ids[upsert.number],
+                    **upsert.model_dump(exclude = {"number"}),
+                    "updated_at": now,
+                    "change_seq": next_change
+                })
+                upserts.append({"number": upsert.number, "status": "updated"})
+                next_change += 1
+            else:
+                upserts.append({"number": upsert.number, "status": "not_found"})
+
+        if updates:
+            await self.db.execute(update(Contacts), updates)
+
+        if deleted:
+            await self.db.execute(update(Contacts), [
+                {"id": id, **TOMBSTONE, "deleted_at": now, "updated_at": now, "change_seq": next_change + index}
+                for index, id in enumerate(deleted)
+            ])
+
+        await self.db.commit()
+
+        if created or updates or deleted:
+            await response_cache.bump(user.id)
+
+        return {
+            "upserts": upserts,
+            "deletes": [{"number": number, "status": "deleted" if number in ids else "not_found"} for number in batch.deletes]
+        }
+
+    @writes
+    async def update_contact(self, contact: ContactModel, contact_obj: Contacts) -> Contacts|None:
         """
         Updates an existing contact.
 
+        The contact is reloaded once the user's row lock is held, so a delete that committed after it was
+        read is seen and its tombstone is not filled with personal data again.
+
         :param contact: Updated contact data.
         :type contact: ContactModel
         :param contact_obj: Contact object to update.
         :type contact_obj: Contacts
-        :return: Updated contact object.
-        :rtype: Contacts
+        :return: Updated contact object, or None if the contact has been deleted meanwhile.
+        :rtype: Contacts | None
         """
+        _, change = await self.reserve(contact_obj.user, changes = 1)
+        await self.db.refresh(contact_obj)
+
+        if contact_obj.deleted_at is not None:
+            await self.db.rollback()
+            return None
+
+        contact_obj.change_seq = change
         contact_obj.name = contact.name
         contact_obj.surname = contact.surname
         contact_obj.email_address = contact.email_address
@@ -119,21 +534,34 @@ class ContactsDB:
         contact_obj.additional_data = contact.additional_data
 
         self.db.add(contact_obj)
-        self.db.commit()
-        self.db.refresh(contact_obj)
+        await self.db.commit()
+        await response_cache.bump(contact_obj.user)
+        await self.db.refresh(contact_obj)
         return contact_obj
 
+    @writes
     async def delete_contact(self, user: Users, contact_id: int) -> None:
         """
-        Deletes a contact.
+        Deletes a contact, keeping it as a tombstone without personal data that delta sync reports to clients.
+
+        The contact is read only once the user's row lock is held, so it cannot be changed in between.
 
         :param user: User object.
         :type user: Users
-        :param contact_id: ID of the contact to delete.
+        :param contact_id: Per-user number of the contact to delete.
         :type contact_id: int
         """
+        _, change = await self.reserve(user.id, changes = 1)
         contact = await self.get_contact(user, contact_id)
 
-        if contact:
-            self.db.delete(contact)
-            self.db.commit()
+        if contact is None:
+            await self.db.rollback()
+            return
+
+        for field, value in TOMBSTONE.items():
+            setattr(contact, field, value)
+
+        contact.deleted_at = contact.updated_at = utcnow()
+        contact.change_seq = change
+        await self.db.commit()
+        await response_cache.bump(user.id)
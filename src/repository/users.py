@@ -1,47 +1,52 @@
-from sqlalchemy.orm import Session, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, select
 from datetime import datetime, UTC
-from libgravatar import Gravatar
 
+from src.services.cache import principal_cache
+from src.database.routing import read_only, writes
+from src.services.metrics import instrument_repository
 from src.database.models import Users
 from src.schemas import UserSingupModel
 
 
+@instrument_repository
 class UsersDB:
     """
     Handles database operations related to users.
     """
 
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: AsyncSession) -> None:
         self.db = db
     
-    async def get_users_objects(self) -> Query[Users]:
+    async def get_users_objects(self) -> Select[tuple[Users]]:
         """
-        Retrieves all users from the database.
+        Builds a select statement for all users in the database.
 
-        :return: Query object for users.
-        :rtype: Query[Users]
+        :return: Select statement for users.
+        :rtype: Select[tuple[Users]]
         """
-        return self.db.query(Users)
+        return select(Users)
     
-    async def filter_objects(self, objects: Query[Users], **kwargs) -> Query[Users]:
+    async def filter_objects(self, objects: Select[tuple[Users]], **kwargs) -> Select[tuple[Users]]:
         """
-        Filters Query objects based on provided key-value pairs.
+        Filters a select statement based on provided key-value pairs.
 
-        :param objects: Query objects to filter.
-        :type objects: Query[Users]
+        :param objects: Select statement to filter.
+        :type objects: Select[tuple[Users]]
         :param kwargs: Key-value pairs for filtering.
         :type kwargs: dict
-        :return: Filtered Query objects.
-        :rtype: Query[Users]
+        :return: Filtered select statement.
+        :rtype: Select[tuple[Users]]
         """
         for key, value in kwargs.items():
             if value:
                 try:
-                    objects = objects.filter(getattr(Users, key) == value)
+                    objects = objects.where(getattr(Users, key) == value)
                 except AttributeError:
                     pass
         return objects
 
+    @read_only
     async def get_users(self) -> list[Users]:
         """
         Retrieves all users.
@@ -50,8 +55,10 @@ class UsersDB:
         :rtype: list[Users]
         """
         users = await self.get_users_objects()
-        return users.all()
+        result = await self.db.execute(users)
+        return list(result.scalars().all())
 
+    @read_only
     async def get_user(self, **kwargs) -> Users|None:
         """
         Retrieves a specific user based on provided criteria.
@@ -69,39 +76,35 @@ class UsersDB:
             email = kwargs.get("email"),
             phone_number = kwargs.get("phone_number")
             )
-        return contact.first()
+        result = await self.db.execute(contact.limit(1))
+        return result.scalars().first()
 
+    @writes
     async def create_user(self, user: UserSingupModel) -> Users:
         """
         Creates a new user.
 
+        The avatar is left empty; UserModel falls back to the Gravatar URL of the email when it is serialized.
+
         :param user: UserSignupModel instance containing user data.
         :type user: UserSingupModel
         :return: Newly created user object.
         :rtype: Users
         """
-        avatar = None
-
-        try:
-            g = Gravatar(user.email)
-            avatar = g.get_image()
-        except Exception as e:
-            print(e)
-
         new_contact = Users(
         username = user.username,
         email = user.email,
         phone_number = user.phone_number,
         password = user.password,
-        avatar = avatar,
         created_at = datetime.now(UTC)
         )
     
         self.db.add(new_contact)
-        self.db.commit()
-        self.db.refresh(new_contact)
+        await self.db.commit()
+        await self.db.refresh(new_contact)
         return new_contact
 
+    @writes
     async def update_user(self, user: UserSingupModel, user_obj: Users) -> Users:
         """
         Updates an existing user.
@@ -117,10 +120,12 @@ class UsersDB:
         user_obj.password = user.password
 
         self.db.add(user_obj)
-        self.db.commit()
-        self.db.refresh(user_obj)
+        await self.db.commit()
+        await self.db.refresh(user_obj)
+        await principal_cache.invalidate(user_obj.id)
         return user_obj
 
+    @writes
     async def delete_user(self, user_id: int) -> None:
         """
         Deletes a user.
@@ -131,9 +136,11 @@ class UsersDB:
         user = await self.get_user(id = user_id)
 
         if user:
-            self.db.delete(user)
-            self.db.commit()
+            await self.db.delete(user)
+            await self.db.commit()
+            await principal_cache.invalidate(user_id)
 
+    @writes
     async def update_token(self, user: Users, token: str | None) -> None:
         """
         Updates the refresh token for a user.
@@ -144,8 +151,9 @@ class UsersDB:
         :type token: str | None
         """
         user.refresh_token = token
-        self.db.commit()
+        await self.db.commit()
 
+    @writes
     async def confirmed_email(self, email: str) -> None:
         """
         Marks user's email as confirmed.
@@ -155,8 +163,10 @@ class UsersDB:
         """
         user = await self.get_user(email = email)
         user.confirmed = True
-        self.db.commit()
+        await self.db.commit()
+        await principal_cache.invalidate(user.id)
 
+    @writes
     async def update_avatar(self, user_id: int, url: str) -> Users:
         """
         Updates user's avatar URL.
@@ -170,5 +180,6 @@ class UsersDB:
         """
         user = await self.get_user(id = user_id)
         user.avatar = url
-        self.db.commit()
+        await self.db.commit()
+        await principal_cache.invalidate(user_id)
         return user
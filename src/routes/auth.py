@@ -1,12 +1,14 @@
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
 from fastapi import APIRouter, HTTPException, Depends, status, Security, BackgroundTasks, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 
 from src.schemas import UserSingupModel, UserResponse, TokenModel, RequestEmail, StringResponse
 from src.services.auth import auth_service
 from src.services.email import send_email
 from src.repository.users import UsersDB
 from src.database.db import get_db
+from src.database.routing import use_primary
 
 
 router = APIRouter(prefix='/auth', tags=["auth"])
@@ -18,7 +20,7 @@ async def signup(
     background_tasks: BackgroundTasks,
     body: UserSingupModel,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
     ) -> UserResponse:
     """
     Endpoint to sign up a new user.
@@ -30,19 +32,25 @@ async def signup(
     :param request: FastAPI Request instance.
     :type request: Request
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :return: Response containing the newly created user details.
     :rtype: UserResponse
-    :raises HTTPException 409: If the account already exists.
+    :raises HTTPException 409: If an account with this email or username already exists.
     """
 
-    exist_user = await UsersDB(db = db).get_user(email = body.email)
+    use_primary(db)
+    exist_user = await UsersDB(db = db).get_user(email = body.email) or await UsersDB(db = db).get_user(username = body.username)
     
     if exist_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
     
-    body.password = auth_service.get_password_hash(body.password)
-    new_user = await UsersDB(db = db).create_user(body)
+    body.password = await auth_service.get_password_hash(body.password)
+
+    try:
+        new_user = await UsersDB(db = db).create_user(body)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
 
     background_tasks.add_task(send_email, body.email, body.username, request.base_url)
     return {"user": new_user, "detail": "User successfully created. Check your email for confirmation."}
@@ -51,7 +59,7 @@ async def signup(
 @router.post("/login")
 async def login(
     body: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
     ) -> TokenModel:
     """
     Endpoint for user login.
@@ -59,7 +67,7 @@ async def login(
     :param body: OAuth2PasswordRequestForm containing username and password.
     :type body: OAuth2PasswordRequestForm
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :return: Response containing access and refresh tokens.
     :rtype: TokenModel
     :raises HTTPException 401: If the username or password is invalid, or the email is not confirmed.
@@ -73,7 +81,7 @@ async def login(
     if not user.confirmed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed")
     
-    if not auth_service.verify_password(body.password, user.password):
+    if not await auth_service.verify_password(body.password, user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
     
     access_token = await auth_service.create_access_token(data={"sub": str(user.id)})
@@ -85,7 +93,7 @@ async def login(
 @router.get('/refresh-token')
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Security(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
     ) -> TokenModel:
     """
     Endpoint for refreshing access token using refresh token.
@@ -93,7 +101,7 @@ async def refresh_token(
     :param credentials: HTTPAuthorizationCredentials containing the refresh token.
     :type credentials: HTTPAuthorizationCredentials
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :return: Response containing new access and refresh tokens.
     :rtype: TokenModel
     :raises HTTPException 401: If the refresh token is invalid.
@@ -114,14 +122,14 @@ async def refresh_token(
 
 
 @router.get('/confirmed_email/{token}')
-async def confirmed_email(token: str, db: Session = Depends(get_db)) -> StringResponse:
+async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)) -> StringResponse:
     """
     Endpoint for confirming user email using token.
 
     :param token: Confirmation token.
     :type token: str
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :return: Response indicating email confirmation status.
     :rtype: StringResponse
     :raises HTTPException 400: If there's an error during verification.
@@ -145,7 +153,7 @@ async def request_email(
     body: RequestEmail,
     background_tasks: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
     ) -> StringResponse:
     """
     Endpoint for resend confirmation email if email is not confirmed.
@@ -157,7 +165,7 @@ async def request_email(
     :param request: FastAPI Request instance.
     :type request: Request
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :return: Response indicating email confirmation status or request to check email for confirmation.
     :rtype: StringResponse
     """
@@ -1,51 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, status
+from fastapi.responses import StreamingResponse
 from fastapi_limiter.depends import RateLimiter
-from sqlalchemy.orm import Session
-from datetime import date, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Literal
+from datetime import date
 
-from src.schemas import ContactModel, ListContactsResponse, ContactResponse, DeleteContact, CreateContact, UpdateContact
+from src.schemas import (ContactModel, ListContactsResponse, ContactResponse, ContactChangesResponse, DeleteContact, CreateContact,
+                         UpdateContact, ImportContacts, ContactsBatch, ContactsBatchResponse)
+from src.services.contacts_io import read_contacts, write_contacts
+from src.services.response_cache import response_cache
+from src.services.serializers import contacts_json
 from src.repository.contacts import ContactsDB
 from src.services.auth import auth_service
 from src.database.models import Users
-from src.database.db import get_db
+from src.database.db import get_db, SessionLocal
+from src.database.routing import use_primary
+from src.conf.config import settings
 
 
 router = APIRouter(prefix='/contacts', tags=["contacts"])
 
 
+async def contacts_export(format: str, compress: bool, **kwargs) -> AsyncIterator[bytes]:
+    """
+    Yields an export of contacts read from a server-side cursor.
+
+    :param format: ``csv``, ``vcard`` or ``ndjson``.
+    :type format: str
+    :param compress: Whether to gzip the output.
+    :type compress: bool
+    :param kwargs: Filtering criteria passed to ContactsDB.stream_contacts.
+    :type kwargs: dict
+    :return: Async iterator over output chunks.
+    :rtype: AsyncIterator[bytes]
+    """
+
+    async with SessionLocal() as db:
+        async for chunk in write_contacts(ContactsDB(db = db).stream_contacts(**kwargs), format, compress):
+            yield chunk
+
+
+EXPORT_MEDIA_TYPES = {"csv": ("text/csv", "csv"), "vcard": ("text/vcard", "vcf"), "ndjson": ("application/x-ndjson", "ndjson")}
+
+
 @router.get("/", dependencies=[Depends(RateLimiter(times=4, seconds=1))])
 async def get_contacts(
+    request: Request,
     name: str = "",
     surname: str = "",
     email_address: str = "",
-    db: Session = Depends(get_db),
+    q: str = "",
+    limit: int = Query(100, ge = 1, le = 1000),
+    cursor: int = 0,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(auth_service.get_current_user)
     ) -> ListContactsResponse:
     """
-    Retrieve contacts for the current user with optional filtering by name, surname, or email address.
+    Retrieve contacts for the current user with optional filtering by name, surname, or email address,
+    or search them by prefixes with ``q``.
+
+    Pages are cached per user until the user's contacts change. Responses carry an ``ETag``,
+    and a request whose ``If-None-Match`` still matches gets 304 Not Modified.
 
+    :param request: Incoming request, used for the cache key.
+    :type request: Request
     :param name: Filter by name.
     :type name: str
     :param surname: Filter by surname.
     :type surname: str
     :param email_address: Filter by email address.
     :type email_address: str
+    :param q: Search string; when it is not blank, the other filters and ``stream`` are ignored and results are ranked.
+    :type q: str
+    :param limit: Maximum number of contacts on the page.
+    :type limit: int
+    :param cursor: ``next_cursor`` of the previous page.
+    :type cursor: int
+    :param stream: Stream all contacts after the cursor as NDJSON instead of returning a page.
+    :type stream: bool
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :param current_user: Current user object.
     :type current_user: Users
-    :return: Response containing a list of contacts.
+    :return: Response containing a page of contacts and the cursor of the next page.
     :rtype: ListContactsResponse
     """
 
-    contacts = await ContactsDB(db = db).get_contacts(name = name, surname = surname, email_address = email_address, user = current_user.id)
-    return {"contacts": contacts}
+    q = q.strip()
+    filters = {"name": name, "surname": surname, "email_address": email_address, "user": current_user.id}
+
+    if stream and not q:
+        return StreamingResponse(contacts_export("ndjson", False, **filters, cursor = cursor), media_type = "application/x-ndjson")
+
+    cache_key = await response_cache.key(current_user.id, request)
+    if (cached := await response_cache.get(cache_key, request)) is not None:
+        return cached
+
+    if q:
+        contacts = await ContactsDB(db = db).search_contacts(current_user, q, offset = cursor, limit = limit + 1)
+        next_cursor = cursor + limit if len(contacts) > limit else None
+        return await response_cache.respond(cache_key, ListContactsResponse, {"contacts": contacts[:limit], "next_cursor": next_cursor}, request, db)
+
+    rows = await ContactsDB(db = db).get_contact_rows(**filters, cursor = cursor, limit = limit + 1)
+    next_cursor = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].number
+
+    return await response_cache.store(cache_key, contacts_json(rows, next_cursor), request, db)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(RateLimiter(times=1, minutes=1))])
 async def create_contact(
     contact: ContactModel,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(auth_service.get_current_user)
     ) -> CreateContact:
     """
@@ -54,7 +124,7 @@ async def create_contact(
     :param contact: Contact data to create.
     :type contact: ContactModel
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :param current_user: Current user object.
     :type current_user: Users
     :return: Response containing the newly created contact.
@@ -65,19 +135,174 @@ async def create_contact(
     return {"contact": new_contact, "detail": "Contact successfully created"}
 
 
+@router.post("/import", dependencies=[Depends(RateLimiter(times=1, minutes=1))])
+async def import_contacts(
+    file: UploadFile = File(),
+    format: Literal["csv", "vcard"] = "csv",
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(auth_service.get_current_user)
+    ) -> ImportContacts:
+    """
+    Import contacts for the current user from a CSV or vCard file.
+
+    The file is read and validated in batches, and every valid batch is inserted in its own transaction.
+    Invalid records are skipped and reported with their position in the file.
+
+    :param file: CSV file with a ContactModel header, or vCard file.
+    :type file: UploadFile
+    :param format: Format of the file.
+    :type format: str
+    :param db: Database session dependency.
+    :type db: AsyncSession
+    :param current_user: Current user object.
+    :type current_user: Users
+    :return: Response containing the number of imported and failed records with their errors.
+    :rtype: ImportContacts
+    """
+
+    imported = 0
+    failed = 0
+    errors = []
+
+    async for contacts, batch_errors in read_contacts(file, format, settings.import_batch_size):
+        imported += await ContactsDB(db = db).create_contacts(current_user, contacts)
+        failed += len(batch_errors)
+        errors.extend(batch_errors[:settings.import_max_errors - len(errors)])
+
+    return {"imported": imported, "failed": failed, "errors": errors, "detail": "Contacts successfully imported"}
+
+
+@router.get("/export", dependencies=[Depends(RateLimiter(times=1, minutes=1))])
+async def export_contacts(
+    format: Literal["csv", "vcard", "ndjson"] = "csv",
+    gzip: bool = False,
+    current_user: Users = Depends(auth_service.get_current_user)
+    ) -> StreamingResponse:
+    """
+    Export all contacts of the current user as a CSV, vCard or NDJSON file.
+
+    The file is streamed from a server-side cursor, so memory use does not depend on the number of contacts.
+
+    :param format: Format of the file.
+    :type format: str
+    :param gzip: Whether to gzip the file.
+    :type gzip: bool
+    :param current_user: Current user object.
+    :type current_user: Users
+    :return: Streaming response with the file.
+    :rtype: StreamingResponse
+    """
+
+    media_type, extension = EXPORT_MEDIA_TYPES[format]
+    filename = f"contacts.{extension}"
+
+    if gzip:
+        media_type, filename = "application/gzip", f"{filename}.gz"
+
+    return StreamingResponse(
+        contacts_export(format, gzip, user = current_user.id),
+        media_type = media_type,
+        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/changes", dependencies=[Depends(RateLimiter(times=4, seconds=1))])
+async def get_changes(
+    request: Request,
+    since: int = Query(0, ge = 0),
+    limit: int = Query(500, ge = 1, le = 1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(auth_service.get_current_user)
+    ) -> ContactChangesResponse:
+    """
+    Retrieve the current user's contacts created, updated or deleted since a cursor.
+
+    Without ``since`` every contact is returned, so a client starts with a full sync. Each page returns
+    the ``cursor`` to pass as ``since`` next time; ``has_more`` tells whether to fetch the next page now.
+    The cursor is the user's change sequence number, which follows commit order, so no change is skipped.
+
+    :param request: Incoming request, used for the cache key.
+    :type request: Request
+    :param since: Cursor returned by the previous sync.
+    :type since: int
+    :param limit: Maximum number of changes to return.
+    :type limit: int
+    :param db: Database session dependency.
+    :type db: AsyncSession
+    :param current_user: Current user object.
+    :type current_user: Users
+    :return: Changed and deleted contacts with the next cursor.
+    :rtype: ContactChangesResponse
+    """
+
+    cache_key = await response_cache.key(current_user.id, request)
+    if (cached := await response_cache.get(cache_key, request)) is not None:
+        return cached
+
+    changes = await ContactsDB(db = db).get_changes(current_user, since, limit = limit + 1)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    cursor = changes[-1].change_seq if changes else since
+
+    return await response_cache.respond(cache_key, ContactChangesResponse, {
+        "contacts": [contact for contact in changes if contact.deleted_at is None],
+        "deleted": [contact for contact in changes if contact.deleted_at is not None],
+        "cursor": cursor,
+        "has_more": has_more
+    }, request, db)
+
+
+@router.patch("/batch", dependencies=[Depends(RateLimiter(times=10, minutes=1))])
+async def batch_contacts(
+    batch: ContactsBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(auth_service.get_current_user)
+    ) -> ContactsBatchResponse:
+    """
+    Create, update and delete many contacts of the current user in one transaction.
+
+    Upserts with a ``number`` update that contact, upserts without one create a new contact,
+    and ``deletes`` lists the numbers of contacts to delete. Each item gets its own result;
+    numbers of missing contacts are reported as ``not_found`` and do not fail the batch.
+
+    :param batch: Upserts and numbers of contacts to delete.
+    :type batch: ContactsBatch
+    :param db: Database session dependency.
+    :type db: AsyncSession
+    :param current_user: Current user object.
+    :type current_user: Users
+    :return: Per-item results.
+    :rtype: ContactsBatchResponse
+    :raises HTTPException: If the batch has more than ``batch_max_items`` items.
+    """
+
+    if len(batch.upserts) + len(batch.deletes) > settings.batch_max_items:
+        raise HTTPException(
+            status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail = f"A batch may contain at most {settings.batch_max_items} items"
+        )
+
+    results = await ContactsDB(db = db).apply_batch(current_user, batch)
+    return {**results, "detail": "Contacts successfully updated"}
+
+
 @router.get("/{contact_id}", dependencies=[Depends(RateLimiter(times=4, seconds=1))])
 async def get_contact(
     contact_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(auth_service.get_current_user)
     ) -> ContactResponse:
     """
     Retrieve the current user's contact by ID.
 
-    :param contact_id: ID of the contact.
+    :param contact_id: Per-user number of the contact.
     :type contact_id: int
+    :param request: Incoming request, used for the cache key.
+    :type request: Request
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :param current_user: Current user object.
     :type current_user: Users
     :return: Response containing the contact information.
@@ -85,30 +310,34 @@ async def get_contact(
     :raises HTTPException: If the contact is not found.
     """
 
+    cache_key = await response_cache.key(current_user.id, request)
+    if (cached := await response_cache.get(cache_key, request)) is not None:
+        return cached
+
     contact = await ContactsDB(db = db).get_contact(current_user, contact_id)
     
     if contact is None:
         raise HTTPException(status_code = status.HTTP_404_NOT_FOUND, detail = "Contact not found")
     
-    return contact
+    return await response_cache.respond(cache_key, ContactResponse, contact, request, db)
 
 
 @router.put("/{contact_id}", dependencies=[Depends(RateLimiter(times=1, minutes=1))])
 async def update_contact(
     contact_id: int,
     contact: ContactModel,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(auth_service.get_current_user)
     ) -> UpdateContact:
     """
     Update a specific contact by ID for the current user.
 
-    :param contact_id: ID of the contact to update.
+    :param contact_id: Per-user number of the contact to update.
     :type contact_id: int
     :param contact: Updated contact data.
     :type contact: ContactModel
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :param current_user: Current user object.
     :type current_user: Users
     :return: Response containing the updated contact information.
@@ -116,28 +345,33 @@ async def update_contact(
     :raises HTTPException: If the specified contact is not found.
     """
 
+    use_primary(db)
     contact_obj = await ContactsDB(db = db).get_contact(current_user, contact_id)
     
     if contact_obj is None:
         raise HTTPException(status_code = status.HTTP_404_NOT_FOUND, detail = "Contact not found")
 
     new_contact = await ContactsDB(db = db).update_contact(contact, contact_obj)
+
+    if new_contact is None:
+        raise HTTPException(status_code = status.HTTP_404_NOT_FOUND, detail = "Contact not found")
+
     return {"contact": new_contact, "detail": "Contact successfully updated"}
 
 
 @router.delete("/{contact_id}")
 async def delete_contact(
     contact_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(auth_service.get_current_user)
     ) -> DeleteContact:
     """
     Delete contact of current user by ID.
 
-    :param contact_id: ID of the contact to delete.
+    :param contact_id: Per-user number of the contact to delete.
     :type contact_id: int
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :param current_user: Current user object.
     :type current_user: Users
     :return: Response indicating successful deletion of the contact.
@@ -151,7 +385,8 @@ async def delete_contact(
 @router.get("/birthdays/{days_to_birthday}", dependencies=[Depends(RateLimiter(times=4, seconds=1))])
 async def get_contacts_by_birthday(
     days_to_birthday: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(auth_service.get_current_user)
     ) -> ListContactsResponse:
     """
@@ -159,33 +394,20 @@ async def get_contacts_by_birthday(
 
     :param days_to_birthday: Number of days to include before the birthday.
     :type days_to_birthday: int
+    :param request: Incoming request, used for the cache key.
+    :type request: Request
     :param db: Database session dependency.
-    :type db: Session
+    :type db: AsyncSession
     :param current_user: Current user object.
     :type current_user: Users
     :return: Response containing a list of contacts with birthdays within the specified range.
     :rtype: ListContactsResponse
     """
 
-    start_day = date.today()
-    end_day = start_day + timedelta(days=days_to_birthday)
-    contacts_obj = await ContactsDB(db = db).get_contacts(user = current_user.id)
-    
-    contact_list = []
-
-    for contact in contacts_obj:
-        if start_day.year % 4 != 0 and (contact.birthday.month == 2 and contact.birthday.day == 29):
-            contact_date = date(start_day.year, contact.birthday.month, 28)
-        else:
-            contact_date = date(start_day.year, contact.birthday.month, contact.birthday.day)
-        
-        if start_day <= contact_date <= end_day:
-            contact_list.append(contact)
-
-        if start_day.year != end_day.year:
-            contact_date = date(end_day.year, contact.birthday.month, contact.birthday.day)
-        
-            if start_day <= contact_date <= end_day:
-                contact_list.append(contact)
-
-    return {"contacts": contact_list}
+    today = date.today()
+    cache_key = await response_cache.key(current_user.id, request, today)
+    if (cached := await response_cache.get(cache_key, request)) is not None:
+        return cached
+
+    contacts = await ContactsDB(db = db).get_contacts_by_birthday(current_user, today, days_to_birthday)
+    return await response_cache.respond(cache_key, ListContactsResponse, {"contacts": contacts}, request, db)
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from src.services.metrics import StatsCollector
+from src.services.auth import auth_service
+from src.database.db import engine
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+REGISTRY.register(StatsCollector(
+    "db_pool",
+    lambda: engine.sync_engine.pool.stats(),
+    counters = ("checkouts", "waits", "timeouts", "checkout_seconds")
+))
+REGISTRY.register(StatsCollector("password_hasher", auth_service.hasher.stats, counters = ("completed",)))
+
+
+@router.get("")
+async def read_metrics() -> Response:
+    """
+    Get all metrics in the Prometheus text format.
+
+    :return: Prometheus exposition.
+    :rtype: Response
+    """
+
+    return Response(generate_latest(), media_type = CONTENT_TYPE_LATEST)
+
+
+@router.get("/pool")
+async def read_pool_metrics() -> dict:
+    """
+    Get the database connection pool counters.
+
+    :return: Pool size, connections in use, checkout waits, timeouts and checkout latency.
+    :rtype: dict
+    """
+
+    return engine.sync_engine.pool.stats()
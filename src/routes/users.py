@@ -1,14 +1,11 @@
-from fastapi import APIRouter, Depends, UploadFile, File
-from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, UploadFile, File, status
+from uuid import uuid4
 
-from src.database.db import get_db
+from src.services.avatars import avatar_jobs, process_avatar, save_upload
 from src.database.models import Users
-from src.repository.users import UsersDB
 from src.services.auth import auth_service
 from src.conf.config import settings
-from src.schemas import UserModel
+from src.schemas import AvatarJob, UserModel
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -26,34 +23,68 @@ async def read_users_me(current_user: Users = Depends(auth_service.get_current_u
     return current_user
 
 
-@router.patch('/avatar')
+@router.patch('/avatar', status_code=status.HTTP_202_ACCEPTED)
 async def update_avatar_user(
+    request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(),
-    current_user: Users = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db)
-    ) -> UserModel:
+    current_user: Users = Depends(auth_service.get_current_user)
+    ) -> AvatarJob:
     """
-    Update the avatar of the current logged-in user.
+    Accept a new avatar for the current logged-in user.
 
+    The upload is copied to a temporary file and then resized, stored and saved in a background task.
+
+    :param request: Incoming request, used to build the status URL.
+    :type request: Request
+    :param background_tasks: Background tasks of the response.
+    :type background_tasks: BackgroundTasks
     :param file: Uploaded image file for the avatar.
     :type file: UploadFile
     :param current_user: Current user object.
     :type current_user: Users
-    :param db: Database session dependency.
-    :type db: Session
-    :return: Updated user object with the new avatar URL.
-    :rtype: UserModel
+    :return: Avatar job with its status URL.
+    :rtype: AvatarJob
     """
 
-    cloudinary.config(
-        cloud_name = settings.cloudinary_name,
-        api_key = settings.cloudinary_api_key,
-        api_secret = settings.cloudinary_api_secret,
-        secure = True
+    path = await save_upload(file, settings.avatar_max_bytes)
+    job_id = uuid4().hex
+
+    await avatar_jobs.set(job_id, {"status": "queued", "user": current_user.id})
+    background_tasks.add_task(process_avatar, job_id, current_user.id, current_user.username, path)
+
+    return AvatarJob(
+        job_id = job_id,
+        status = "queued",
+        status_url = str(request.url_for("read_avatar_job", job_id = job_id))
     )
 
-    r = cloudinary.uploader.upload(file.file, public_id=f'ContactsApp/{current_user.username}', overwrite=True)
-    src_url = cloudinary.CloudinaryImage(f'ContactsApp/{current_user.username}')\
-                        .build_url(width=250, height=250, crop='fill', version=r.get('version'))
-    user = await UsersDB(db = db).update_avatar(current_user.id, src_url)
-    return user
+
+@router.get('/avatar/{job_id}')
+async def read_avatar_job(job_id: str, request: Request, current_user: Users = Depends(auth_service.get_current_user)) -> AvatarJob:
+    """
+    Get the status of an avatar job of the current logged-in user.
+
+    :param job_id: ID of the job.
+    :type job_id: str
+    :param request: Incoming request, used to build the status URL.
+    :type request: Request
+    :param current_user: Current user object.
+    :type current_user: Users
+    :return: Avatar job.
+    :rtype: AvatarJob
+    :raises HTTPException: If the job is not found.
+    """
+
+    job = await avatar_jobs.get(job_id)
+
+    if job is None or job["user"] != current_user.id:
+        raise HTTPException(status_code = status.HTTP_404_NOT_FOUND, detail = "Avatar job not found")
+
+    return AvatarJob(
+        job_id = job_id,
+        status = job["status"],
+        status_url = str(request.url_for("read_avatar_job", job_id = job_id)),
+        avatar = job.get("avatar"),
+        detail = job.get("detail")
+    )
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, EmailStr, PastDate, validator
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
+
+from src.services.gravatar import gravatar_url
 
 
 def valid_number(phone_number: str | None):
@@ -39,9 +41,22 @@ class ContactModel(BaseModel):
 
 class ContactResponse(ContactModel):
     id: int
+    number: int
 
 class ListContactsResponse(BaseModel):
     contacts: list[ContactResponse]
+    next_cursor: Optional[int] = None
+
+class DeletedContact(BaseModel):
+    id: int
+    number: int
+    deleted_at: datetime
+
+class ContactChangesResponse(BaseModel):
+    contacts: list[ContactResponse]
+    deleted: list[DeletedContact]
+    cursor: int
+    has_more: bool
 
 class CreateContact(BaseModel):
     contact: ContactResponse
@@ -54,6 +69,46 @@ class UpdateContact(BaseModel):
 class DeleteContact(BaseModel):
     detail: str = "Contact successfully deleted"
 
+class ContactUpsert(ContactModel):
+    number: Optional[int] = None
+
+class ContactsBatch(BaseModel):
+    upserts: list[ContactUpsert] = []
+    deletes: list[int] = []
+
+    @validator('deletes', always=True)
+    def unique_numbers(cls, deletes, values):
+        numbers = [upsert.number for upsert in values.get('upserts', []) if upsert.number is not None] + deletes
+        if len(numbers) != len(set(numbers)):
+            raise ValueError("Each contact number may appear only once in a batch")
+        return deletes
+
+class BatchItemResult(BaseModel):
+    number: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "not_found"]
+
+class ContactsBatchResponse(BaseModel):
+    upserts: list[BatchItemResult]
+    deletes: list[BatchItemResult]
+    detail: str = "Contacts successfully updated"
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+class ImportContacts(BaseModel):
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+    detail: str = "Contacts successfully imported"
+
+class AvatarJob(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    avatar: Optional[str] = None
+    detail: Optional[str] = None
+
 class UserSingupModel(BaseModel):
     username: str
     email: str
@@ -77,6 +132,12 @@ class UserModel(BaseModel):
     def validate_phone_number(cls, phone_number):
         return valid_number(phone_number)
 
+    @validator('avatar', always=True)
+    def default_avatar(cls, avatar, values):
+        if avatar is None and values.get('email'):
+            return gravatar_url(values['email'])
+        return avatar
+
 class UserResponse(BaseModel):
     user: UserModel
     detail: str = "User successfully created"
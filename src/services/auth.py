@@ -3,14 +3,19 @@ from typing import Optional
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta, UTC
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
+import hashlib
+import time
 
+from src.services.hashing import PasswordHasher
+from src.services.cache import LRUCache, principal_cache
+from src.services.metrics import JWT_DECODE_LATENCY
 from src.repository.users import UsersDB
 from src.database.models import Users
 from src.conf.config import settings
 from src.database.db import get_db
+from src.database.routing import use_primary
 
 
 class Auth:
@@ -19,13 +24,14 @@ class Auth:
     """
     
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
     def __init__(self) -> None:
         self.SECRET_KEY = settings.secret_key
         self.ALGORITHM = settings.algorithm
+        self.hasher = PasswordHasher(max_workers=settings.password_hash_workers)
+        self.tokens = LRUCache(maxsize=settings.jwt_cache_size)
 
-    def verify_password(self, plain_password, hashed_password) -> bool:
+    async def verify_password(self, plain_password, hashed_password) -> bool:
         """
         Verify whether the provided plain password matches the hashed password.
 
@@ -37,9 +43,9 @@ class Auth:
         :rtype: bool
         """
 
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await self.hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str) -> str:
+    async def get_password_hash(self, password: str) -> str:
         """
         Generates a hashed version of the provided password.
 
@@ -49,7 +55,7 @@ class Auth:
         :rtype: str
         """
 
-        return self.pwd_context.hash(password)
+        return await self.hasher.hash(password)
 
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None) -> str:
         """
@@ -117,14 +123,43 @@ class Auth:
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Users:
+    def decode_token(self, token: str) -> dict:
+        """
+        Decodes and verifies a token, reusing the claims of tokens that were already verified.
+
+        Verified claims are cached under the SHA-256 digest of the token until the token's ``exp``.
+
+        :param token: Encoded token.
+        :type token: str
+        :return: Token claims.
+        :rtype: dict
+        :raises JWTError: If the token is invalid or expired.
+        """
+
+        start = time.perf_counter()
+        digest = hashlib.sha256(token.encode()).digest()
+        payload = self.tokens.get(digest)
+
+        if payload is not None:
+            JWT_DECODE_LATENCY.labels("hit").observe(time.perf_counter() - start)
+            return payload
+
+        payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            self.tokens.set(digest, payload, ttl)
+
+        JWT_DECODE_LATENCY.labels("miss").observe(time.perf_counter() - start)
+        return payload
+
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Users:
         """
         Retrieve the current user based on the provided access token.
 
         :param token: Access token.
         :type token: str
         :param db: Database session dependency.
-        :type db: Session
+        :type db: AsyncSession
         :return: Current user object.
         :rtype: Users
         :raises HTTPException: If the credentials cannot be validated or the user is not found.
@@ -137,7 +172,7 @@ class Auth:
         )
 
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.decode_token(token)
             if payload['scope'] == 'access_token':
                 id = payload["sub"]
                 if id is None:
@@ -147,9 +182,15 @@ class Auth:
         except JWTError as e:
             raise credentials_exception
 
+        user, version = await principal_cache.lookup(int(id))
+        if user is not None:
+            return user
+
+        use_primary(db)
         user = await UsersDB(db = db).get_user(id = int(id))
         if user is None:
             raise credentials_exception
+        await principal_cache.set(user, version)
         return user
 
     async def create_email_token(self, data: dict) -> str:
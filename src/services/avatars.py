@@ -0,0 +1,264 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+import tempfile
+import logging
+import shutil
+import json
+import time
+import os
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from PIL import Image, ImageOps
+import cloudinary
+import cloudinary.uploader
+
+from src.repository.users import UsersDB
+from src.services.cache import LRUCache
+from src.database.db import SessionLocal
+from src.conf.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class AvatarStorage(ABC):
+    """
+    Base class for avatar storage backends.
+
+    ``save`` is blocking and is called from the thread pool.
+    """
+
+    @abstractmethod
+    def save(self, path: Path, user_id: int, username: str) -> str:
+        """
+        Stores a processed avatar image.
+
+        :param path: Path of the processed image.
+        :type path: Path
+        :param user_id: ID of the user.
+        :type user_id: int
+        :param username: Username of the user.
+        :type username: str
+        :return: Public URL of the avatar.
+        :rtype: str
+        """
+
+
+class CloudinaryStorage(AvatarStorage):
+    """
+    Uploads avatars to Cloudinary. The client is configured once, when the storage is created.
+    """
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str, size: int) -> None:
+        cloudinary.config(
+            cloud_name = cloud_name,
+            api_key = api_key,
+            api_secret = api_secret,
+            secure = True
+        )
+        self.size = size
+
+    def save(self, path: Path, user_id: int, username: str) -> str:
+        public_id = f'ContactsApp/{username}'
+        r = cloudinary.uploader.upload(str(path), public_id=public_id, overwrite=True)
+        return cloudinary.CloudinaryImage(public_id)\
+                        .build_url(width=self.size, height=self.size, crop='fill', version=r.get('version'))
+
+
+class LocalStorage(AvatarStorage):
+    """
+    Keeps avatars in a local directory served under ``base_url``. Used for development and tests.
+    """
+
+    def __init__(self, root: Path, base_url: str) -> None:
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def save(self, path: Path, user_id: int, username: str) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, self.root / f"{user_id}.png")
+        return f"{self.base_url}/{user_id}.png?v={time.time_ns()}"
+
+
+class AvatarJobs:
+    """
+    Keeps the status of avatar jobs in Redis, or in memory when Redis is not attached.
+
+    The in-memory fallback keeps at most ``maxsize`` jobs, each for ``ttl`` seconds like in Redis.
+    """
+
+    def __init__(self, ttl: int, maxsize: int) -> None:
+        self.ttl = ttl
+        self.redis: Redis | None = None
+        self.local = LRUCache(maxsize)
+
+    async def init(self, redis: Redis) -> None:
+        """
+        Attaches the shared Redis connection.
+
+        :param redis: Redis connection.
+        :type redis: Redis
+        """
+
+        self.redis = redis
+
+    def key(self, job_id: str) -> str:
+        return f"avatar:job:{job_id}"
+
+    async def set(self, job_id: str, data: dict) -> None:
+        """
+        Stores the status of a job.
+
+        :param job_id: ID of the job.
+        :type job_id: str
+        :param data: Job status.
+        :type data: dict
+        """
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.key(job_id), json.dumps(data), ex=self.ttl)
+                return
+            except RedisError:
+                pass
+        self.local.set(job_id, data, self.ttl)
+
+    async def get(self, job_id: str) -> dict | None:
+        """
+        Retrieves the status of a job.
+
+        :param job_id: ID of the job.
+        :type job_id: str
+        :return: Job status, or None if the job is unknown or expired.
+        :rtype: dict | None
+        """
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self.key(job_id))
+                if raw:
+                    return json.loads(raw)
+            except RedisError:
+                pass
+        return self.local.get(job_id)
+
+
+def create_storage() -> AvatarStorage:
+    """
+    Creates the storage backend selected by ``settings.avatar_storage``.
+
+    :return: Avatar storage.
+    :rtype: AvatarStorage
+    """
+
+    if settings.avatar_storage == "local":
+        return LocalStorage(Path(settings.avatar_local_dir), settings.avatar_local_url)
+    return CloudinaryStorage(
+        cloud_name = settings.cloudinary_name,
+        api_key = settings.cloudinary_api_key,
+        api_secret = settings.cloudinary_api_secret,
+        size = settings.avatar_size
+    )
+
+
+avatar_storage = create_storage()
+avatar_jobs = AvatarJobs(ttl = settings.avatar_job_ttl, maxsize = settings.avatar_job_local_size)
+
+
+async def save_upload(file: UploadFile, max_bytes: int) -> Path:
+    """
+    Copies an uploaded file to a temporary file chunk by chunk.
+
+    The limit only bounds the copy: Starlette has already received and spooled the whole multipart body
+    by the time the route runs, so the request body size has to be capped in front of the app as well,
+    e.g. with ``client_max_body_size`` on the reverse proxy.
+
+    :param file: Uploaded file.
+    :type file: UploadFile
+    :param max_bytes: Maximum accepted size.
+    :type max_bytes: int
+    :return: Path of the temporary file.
+    :rtype: Path
+    :raises HTTPException: If the file is larger than ``max_bytes``.
+    """
+
+    fd, name = tempfile.mkstemp(suffix=".upload")
+    path = Path(name)
+    size = 0
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail = "Avatar is too large")
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+    return path
+
+
+def resize(path: Path, size: int) -> Path:
+    """
+    Normalizes an image to a ``size`` x ``size`` RGB PNG, cropped to fill.
+
+    :param path: Path of the source image.
+    :type path: Path
+    :param size: Width and height of the result.
+    :type size: int
+    :return: Path of the processed image.
+    :rtype: Path
+    """
+
+    with Image.open(path) as image:
+        image.draft("RGB", (size * 2, size * 2))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+
+    result = path.with_suffix(".png")
+    image.save(result, "PNG", optimize=True)
+    return result
+
+
+async def process_avatar(job_id: str, user_id: int, username: str, path: Path) -> None:
+    """
+    Resizes an uploaded avatar, stores it and saves its URL. Runs as a background task.
+
+    Image processing and the upload run in the thread pool, and the user is updated in a new session
+    because the request session is already closed.
+
+    :param job_id: ID of the job.
+    :type job_id: str
+    :param user_id: ID of the user.
+    :type user_id: int
+    :param username: Username of the user.
+    :type username: str
+    :param path: Path of the uploaded file.
+    :type path: Path
+    """
+
+    resized = None
+
+    try:
+        await avatar_jobs.set(job_id, {"status": "processing", "user": user_id})
+        resized = await run_in_threadpool(resize, path, settings.avatar_size)
+        url = await run_in_threadpool(avatar_storage.save, resized, user_id, username)
+
+        async with SessionLocal() as db:
+            await UsersDB(db = db).update_avatar(user_id, url)
+
+        await avatar_jobs.set(job_id, {"status": "done", "user": user_id, "avatar": url})
+    except Exception as err:
+        logger.exception("avatar job %s of user %d failed", job_id, user_id)
+        await avatar_jobs.set(job_id, {"status": "failed", "user": user_id, "detail": str(err)})
+    finally:
+        path.unlink(missing_ok=True)
+        if resized is not None:
+            resized.unlink(missing_ok=True)
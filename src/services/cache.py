@@ -0,0 +1,285 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Hashable
+import asyncio
+import json
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.database.models import Users
+from src.conf.config import settings
+
+
+class LRUCache:
+    """
+    In-process least-recently-used mapping with per-entry expiry.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Returns a cached value if it exists and has not expired.
+
+        :param key: Cache key.
+        :type key: Hashable
+        :return: Cached value or None.
+        :rtype: Any | None
+        """
+
+        item = self.data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        self.data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """
+        Stores a value for the given number of seconds, evicting the least recently used entry when full.
+
+        :param key: Cache key.
+        :type key: Hashable
+        :param value: Value to store.
+        :type value: Any
+        :param ttl: Time to live in seconds.
+        :type ttl: float
+        """
+
+        self.data[key] = (time.monotonic() + ttl, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Removes a value from the cache.
+
+        :param key: Cache key.
+        :type key: Hashable
+        """
+
+        self.data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes all values from the cache.
+        """
+
+        self.data.clear()
+
+
+class PrincipalCache:
+    """
+    Caches authenticated users by id in a local LRU backed by Redis.
+
+    Every user has a version in Redis that ``invalidate`` bumps. Entries are stored with the version read
+    before the user was loaded, and an entry is only served while its version is current, so a fill that
+    raced with an invalidation is ignored instead of serving the old user for the whole TTL. Invalidations
+    are also published to every process, which drop the user from their local LRU.
+    """
+
+    fields = ("id", "username", "email", "phone_number", "avatar", "created_at", "confirmed")
+    channel = "principal:invalidate"
+
+    def __init__(self, maxsize: int, ttl: int, local_ttl: int) -> None:
+        self.local = LRUCache(maxsize)
+        self.versions = LRUCache(maxsize)
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.redis: Redis | None = None
+
+    async def init(self, redis: Redis) -> None:
+        """
+        Attaches the shared Redis connection.
+
+        :param redis: Redis connection.
+        :type redis: Redis
+        """
+
+        self.redis = redis
+
+    def key(self, user_id: int) -> str:
+        return f"principal:{user_id}"
+
+    def version_key(self, user_id: int) -> str:
+        return f"principal:version:{user_id}"
+
+    def dump(self, user: Users) -> dict:
+        """
+        Converts a user to a JSON friendly dict without credentials.
+
+        :param user: User object.
+        :type user: Users
+        :return: User fields.
+        :rtype: dict
+        """
+
+        data = {field: getattr(user, field) for field in self.fields}
+        if data["created_at"] is not None:
+            data["created_at"] = data["created_at"].isoformat()
+        return data
+
+    def load(self, data: dict) -> Users:
+        """
+        Builds a detached user object from cached fields.
+
+        :param data: User fields.
+        :type data: dict
+        :return: User object.
+        :rtype: Users
+        """
+
+        data = dict(data)
+        if data["created_at"] is not None:
+            data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return Users(**data)
+
+    def known_version(self, user_id: int) -> int:
+        return self.versions.get(user_id) or 0
+
+    def forget(self, user_id: int, version: int) -> None:
+        """
+        Drops a user from the local LRU and remembers the version it was invalidated to.
+
+        :param user_id: ID of the user.
+        :type user_id: int
+        :param version: New version of the user.
+        :type version: int
+        """
+
+        self.local.pop(user_id)
+        if version > self.known_version(user_id):
+            self.versions.set(user_id, version, self.ttl * 2)
+
+    async def lookup(self, user_id: int) -> tuple[Users | None, int]:
+        """
+        Retrieves a cached user, checking the local LRU before Redis, together with the user's current version.
+
+        The version must be passed to ``set`` when the user is loaded from the database after a miss.
+
+        :param user_id: ID of the user.
+        :type user_id: int
+        :return: User object if cached, otherwise None, and the version.
+        :rtype: tuple[Users | None, int]
+        """
+
+        version = self.known_version(user_id)
+        entry = self.local.get(user_id)
+
+        if entry is not None and entry["version"] >= version:
+            return self.load(entry["user"]), entry["version"]
+
+        if self.redis is None:
+            return None, version
+
+        try:
+            raw, current = await self.redis.mget(self.key(user_id), self.version_key(user_id))
+        except RedisError:
+            return None, version
+
+        current = int(current or 0)
+        if current > version:
+            self.forget(user_id, current)
+
+        if raw:
+            entry = json.loads(raw)
+            if entry["version"] == current:
+                self.local.set(user_id, entry, self.local_ttl)
+                return self.load(entry["user"]), current
+
+        return None, current
+
+    async def get(self, user_id: int) -> Users | None:
+        """
+        Retrieves a cached user, checking the local LRU before Redis.
+
+        :param user_id: ID of the user.
+        :type user_id: int
+        :return: User object if cached, otherwise None.
+        :rtype: Users | None
+        """
+
+        user, _ = await self.lookup(user_id)
+        return user
+
+    async def set(self, user: Users, version: int = 0) -> None:
+        """
+        Stores a user in the local LRU and in Redis under the version returned by ``lookup``.
+
+        :param user: User object, read from the primary database.
+        :type user: Users
+        :param version: Version of the user read before it was loaded.
+        :type version: int
+        """
+
+        if version < self.known_version(user.id):
+            return
+
+        entry = {"version": version, "user": self.dump(user)}
+        self.local.set(user.id, entry, self.local_ttl)
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.key(user.id), json.dumps(entry), ex=self.ttl)
+            except RedisError:
+                pass
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Bumps the user's version, removes the user from Redis and from the local LRU of every process.
+
+        :param user_id: ID of the user.
+        :type user_id: int
+        """
+
+        version = self.known_version(user_id) + 1
+
+        if self.redis is not None:
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    version, *_ = await (
+                        pipe.incr(self.version_key(user_id))
+                        .expire(self.version_key(user_id), self.ttl * 2)
+                        .delete(self.key(user_id))
+                        .execute()
+                    )
+                await self.redis.publish(self.channel, f"{user_id}:{version}")
+            except RedisError:
+                pass
+
+        self.forget(user_id, version)
+
+    async def listen(self) -> None:
+        """
+        Drops users invalidated by other processes from the local LRU until cancelled.
+
+        Invalidations published while the subscription is down are lost, so the local LRU is cleared
+        every time it subscribes.
+        """
+
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    self.local.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            user_id, version = map(int, message["data"].split(b":"))
+                            self.forget(user_id, version)
+            except RedisError:
+                await asyncio.sleep(1)
+
+
+principal_cache = PrincipalCache(
+    maxsize = settings.principal_cache_size,
+    ttl = settings.principal_cache_ttl,
+    local_ttl = settings.principal_cache_local_ttl
+)
@@ -0,0 +1,260 @@
+from typing import AsyncIterator, Iterator, TextIO
+from itertools import islice
+import json
+import zlib
+import csv
+import re
+import io
+
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from fastapi import UploadFile
+
+from src.database.models import Contacts
+from src.schemas import ContactModel
+
+
+CSV_FIELDS = ("name", "surname", "email_address", "phone_number", "birthday", "additional_data")
+CHUNK_SIZE = 64 * 1024
+
+
+def csv_records(stream: TextIO) -> Iterator[tuple[int, dict]]:
+    """
+    Reads contacts from a CSV file whose header names ContactModel fields.
+
+    :param stream: Text stream with CSV data.
+    :type stream: TextIO
+    :return: Iterator over (record number, contact fields).
+    :rtype: Iterator[tuple[int, dict]]
+    """
+
+    reader = csv.DictReader(stream)
+
+    for index, row in enumerate(reader, start=1):
+        yield index, {field: row.get(field) or None for field in CSV_FIELDS}
+
+
+def vcard_lines(stream: TextIO) -> Iterator[str]:
+    """
+    Yields vCard content lines with folded continuation lines joined back.
+
+    :param stream: Text stream with vCard data.
+    :type stream: TextIO
+    :return: Iterator over unfolded lines.
+    :rtype: Iterator[str]
+    """
+
+    current = None
+
+    for line in stream:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+
+    if current is not None:
+        yield current
+
+
+def vcard_records(stream: TextIO) -> Iterator[tuple[int, dict]]:
+    """
+    Reads contacts from a vCard file.
+
+    ``N`` gives the surname and name (``FN`` is used when ``N`` is missing), ``NOTE`` becomes additional data.
+
+    :param stream: Text stream with vCard data.
+    :type stream: TextIO
+    :return: Iterator over (record number, contact fields).
+    :rtype: Iterator[tuple[int, dict]]
+    """
+
+    index = 0
+    card = None
+
+    for line in vcard_lines(stream):
+        key, _, value = line.partition(":")
+        key = key.split(";")[0].upper()
+        value = re.sub(r"\\(.)", lambda match: "\n" if match[1] in "nN" else match[1], value)
+
+        if key == "BEGIN" and value.upper() == "VCARD":
+            card = {}
+        elif card is None:
+            continue
+        elif key == "END":
+            index += 1
+            yield index, {field: card.get(field) for field in CSV_FIELDS}
+            card = None
+        elif key == "N":
+            parts = value.split(";")
+            card["surname"] = parts[0] or None
+            card["name"] = parts[1] if len(parts) > 1 and parts[1] else card.get("name")
+        elif key == "FN" and "name" not in card:
+            name, _, surname = value.partition(" ")
+            card["name"] = name or None
+            card.setdefault("surname", surname or None)
+        elif key == "EMAIL":
+            card.setdefault("email_address", value)
+        elif key == "TEL":
+            card.setdefault("phone_number", value.replace(" ", "").replace("-", ""))
+        elif key == "BDAY":
+            value = value.replace("-", "")
+            card["birthday"] = f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+        elif key == "NOTE":
+            card["additional_data"] = value
+
+
+def validate_records(records: list[tuple[int, dict]]) -> tuple[list[ContactModel], list[dict]]:
+    """
+    Validates parsed records with ContactModel.
+
+    :param records: List of (record number, contact fields).
+    :type records: list[tuple[int, dict]]
+    :return: Valid contacts and per-record errors.
+    :rtype: tuple[list[ContactModel], list[dict]]
+    """
+
+    contacts = []
+    errors = []
+
+    for index, record in records:
+        try:
+            contacts.append(ContactModel(**record))
+        except ValidationError as e:
+            errors.append({
+                "row": index,
+                "errors": [f"{'.'.join(map(str, error['loc'])) or 'contact'}: {error['msg']}" for error in e.errors()]
+            })
+
+    return contacts, errors
+
+
+async def read_contacts(file: UploadFile, format: str, batch_size: int) -> AsyncIterator[tuple[list[ContactModel], list[dict]]]:
+    """
+    Streams an uploaded CSV or vCard file and yields validated contacts in batches.
+
+    Parsing and validation run in the thread pool one batch at a time, so memory use does not depend on the file size.
+
+    :param file: Uploaded file.
+    :type file: UploadFile
+    :param format: ``csv`` or ``vcard``.
+    :type format: str
+    :param batch_size: Number of records per batch.
+    :type batch_size: int
+    :return: Async iterator over (valid contacts, per-record errors).
+    :rtype: AsyncIterator[tuple[list[ContactModel], list[dict]]]
+    """
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    records = csv_records(stream) if format == "csv" else vcard_records(stream)
+
+    def next_batch() -> tuple[list[ContactModel], list[dict]] | None:
+        batch = list(islice(records, batch_size))
+        return validate_records(batch) if batch else None
+
+    try:
+        while (batch := await run_in_threadpool(next_batch)) is not None:
+            yield batch
+    finally:
+        stream.detach()
+
+
+def vcard_escape(value: str) -> str:
+    """
+    Escapes a vCard property value.
+
+    :param value: Value to escape.
+    :type value: str
+    :return: Escaped value.
+    :rtype: str
+    """
+
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;").replace("\n", "\\n")
+
+
+def write_contact(buffer: io.StringIO, writer, contact: Contacts, format: str) -> None:
+    """
+    Writes one contact to the output buffer.
+
+    :param buffer: Output buffer.
+    :type buffer: io.StringIO
+    :param writer: CSV writer over the buffer, used for the ``csv`` format.
+    :type writer: csv.writer
+    :param contact: Contact object.
+    :type contact: Contacts
+    :param format: ``csv``, ``vcard`` or ``ndjson``.
+    :type format: str
+    """
+
+    if format == "csv":
+        writer.writerow([
+            contact.name, contact.surname, contact.email_address, contact.phone_number,
+            contact.birthday.isoformat(), contact.additional_data or ""
+        ])
+    elif format == "vcard":
+        buffer.write("BEGIN:VCARD\r\nVERSION:3.0\r\n")
+        buffer.write(f"N:{vcard_escape(contact.surname)};{vcard_escape(contact.name)};;;\r\n")
+        buffer.write(f"FN:{vcard_escape(f'{contact.name} {contact.surname}')}\r\n")
+        buffer.write(f"EMAIL;TYPE=INTERNET:{vcard_escape(contact.email_address)}\r\n")
+        buffer.write(f"TEL:{vcard_escape(contact.phone_number)}\r\n")
+        buffer.write(f"BDAY:{contact.birthday.isoformat()}\r\n")
+        if contact.additional_data:
+            buffer.write(f"NOTE:{vcard_escape(contact.additional_data)}\r\n")
+        buffer.write("END:VCARD\r\n")
+    else:
+        buffer.write(json.dumps({
+            "id": contact.id,
+            "number": contact.number,
+            "name": contact.name,
+            "surname": contact.surname,
+            "email_address": contact.email_address,
+            "phone_number": contact.phone_number,
+            "birthday": contact.birthday.isoformat(),
+            "additional_data": contact.additional_data
+        }))
+        buffer.write("\n")
+
+
+async def write_contacts(contacts: AsyncIterator[Contacts], format: str, compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Serializes contacts to CSV, vCard or NDJSON and yields the output in chunks of about 64 KiB.
+
+    Only one chunk is held in memory at a time, optionally gzip compressed.
+
+    :param contacts: Async iterator over contacts.
+    :type contacts: AsyncIterator[Contacts]
+    :param format: ``csv``, ``vcard`` or ``ndjson``.
+    :type format: str
+    :param compress: Whether to gzip the output.
+    :type compress: bool
+    :return: Async iterator over output chunks.
+    :rtype: AsyncIterator[bytes]
+    """
+
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if format == "csv" else None
+
+    if writer is not None:
+        writer.writerow(CSV_FIELDS)
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    async for contact in contacts:
+        write_contact(buffer, writer, contact, format)
+        if buffer.tell() >= CHUNK_SIZE:
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
@@ -1,10 +1,20 @@
+from email.mime.text import MIMEText
+from email.message import Message
+from email.utils import formataddr
 from pathlib import Path
+import asyncio
+import json
+import time
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+from fastapi_mail import ConnectionConfig
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from pydantic import EmailStr
+import aiosmtplib
 
 from src.conf.config import settings
+from src.services.templates import TemplateRegistry
+from src.services.metrics import SMTP_SEND_LATENCY
 from src.services.auth import auth_service
 
 conf = ConnectionConfig(
@@ -22,9 +32,327 @@ conf = ConnectionConfig(
 )
 
 
+class SMTPPool:
+    """
+    Keeps a fixed number of authenticated SMTP connections open and reuses them between messages.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        validate_certs: bool = True,
+        size: int = 2
+    ) -> None:
+        self.options = {
+            "hostname": hostname,
+            "port": port,
+            "username": username,
+            "password": password,
+            "use_tls": use_tls,
+            "start_tls": start_tls,
+            "validate_certs": validate_certs,
+        }
+        self.size = size
+        self.connections: asyncio.Queue[aiosmtplib.SMTP] | None = None
+        self.opened = 0
+
+    @classmethod
+    def from_config(cls, config: ConnectionConfig, size: int) -> "SMTPPool":
+        """
+        Creates a pool from the fastapi_mail connection config.
+
+        :param config: Connection config.
+        :type config: ConnectionConfig
+        :param size: Number of connections.
+        :type size: int
+        :return: SMTP pool.
+        :rtype: SMTPPool
+        """
+
+        return cls(
+            hostname = config.MAIL_SERVER,
+            port = config.MAIL_PORT,
+            username = config.MAIL_USERNAME if config.USE_CREDENTIALS else None,
+            password = config.MAIL_PASSWORD.get_secret_value() if config.USE_CREDENTIALS else None,
+            use_tls = config.MAIL_SSL_TLS,
+            start_tls = config.MAIL_STARTTLS,
+            validate_certs = config.VALIDATE_CERTS,
+            size = size
+        )
+
+    def queue(self) -> asyncio.Queue:
+        if self.connections is None:
+            self.connections = asyncio.Queue()
+            for _ in range(self.size):
+                self.connections.put_nowait(aiosmtplib.SMTP(**self.options))
+        return self.connections
+
+    async def send(self, message: Message) -> None:
+        """
+        Sends a message over a pooled connection, reconnecting once if the server dropped it.
+
+        :param message: Message to send.
+        :type message: Message
+        :raises aiosmtplib.SMTPException: If the message could not be sent.
+        """
+
+        connections = self.queue()
+        client = await connections.get()
+        start = time.perf_counter()
+        result = "error"
+
+        try:
+            for attempt in range(2):
+                try:
+                    if not client.is_connected:
+                        await client.connect()
+                        self.opened += 1
+                    await client.send_message(message)
+                    result = "ok"
+                    return
+                except aiosmtplib.SMTPServerDisconnected:
+                    client.close()
+                    if attempt:
+                        raise
+        except Exception:
+            client.close()
+            raise
+        finally:
+            connections.put_nowait(client)
+            SMTP_SEND_LATENCY.labels(result).observe(time.perf_counter() - start)
+
+    async def close(self) -> None:
+        """
+        Closes all pooled connections.
+        """
+
+        if self.connections is None:
+            return
+
+        for _ in range(self.size):
+            client = await self.connections.get()
+            if client.is_connected:
+                try:
+                    await client.quit()
+                except aiosmtplib.SMTPException:
+                    client.close()
+        self.connections = None
+
+
+class MailQueue:
+    """
+    Redis backed queue of outbound verification emails.
+
+    Taken jobs are moved to a processing list and leased to their worker for ``visibility_timeout`` seconds.
+    They stay there until they are acknowledged, so the jobs of a worker that dies mid-batch are put back
+    by ``recover`` once their lease expires instead of being lost.
+    """
+
+    outbound = "mail:outbound"
+    processing = "mail:processing"
+    leases = "mail:leases"
+    retry = "mail:retry"
+    dead = "mail:dead"
+
+    def __init__(self, visibility_timeout: float = 300) -> None:
+        self.visibility_timeout = visibility_timeout
+        self.redis: Redis | None = None
+
+    async def init(self, redis: Redis) -> None:
+        """
+        Attaches the shared Redis connection.
+
+        :param redis: Redis connection.
+        :type redis: Redis
+        """
+
+        self.redis = redis
+
+    async def enqueue(self, job: dict) -> None:
+        """
+        Appends a job to the outbound queue.
+
+        :param job: Job data.
+        :type job: dict
+        """
+
+        await self.redis.rpush(self.outbound, json.dumps(job))
+
+    async def pop(self, count: int, timeout: float = 1) -> list[tuple[bytes, dict]]:
+        """
+        Moves up to ``count`` jobs from the outbound queue to the processing list and leases them,
+        waiting up to ``timeout`` seconds for the first one.
+
+        :param count: Maximum number of jobs.
+        :type count: int
+        :param timeout: Seconds to wait when the queue is empty.
+        :type timeout: float
+        :return: List of (raw item to pass to ``ack``, job data).
+        :rtype: list[tuple[bytes, dict]]
+        """
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for _ in range(count):
+                pipe.lmove(self.outbound, self.processing, "LEFT", "RIGHT")
+            items = [item for item in await pipe.execute() if item is not None]
+
+        if not items:
+            item = await self.redis.blmove(self.outbound, self.processing, timeout, "LEFT", "RIGHT")
+            items = [item] if item else []
+
+        if items:
+            deadline = time.time() + self.visibility_timeout
+            await self.redis.zadd(self.leases, {item: deadline for item in items})
+
+        return [(item, json.loads(item)) for item in items]
+
+    async def ack(self, item: bytes) -> None:
+        """
+        Removes a job that was delivered, scheduled for a retry or buried from the processing list.
+
+        :param item: Raw item returned by ``pop``.
+        :type item: bytes
+        """
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            await pipe.lrem(self.processing, 1, item).zrem(self.leases, item).execute()
+
+    async def recover(self) -> int:
+        """
+        Moves jobs whose lease has expired back to the front of the outbound queue.
+
+        Jobs of live workers are left alone as long as they are acknowledged within ``visibility_timeout``.
+        A job found without a lease, taken by a worker that stopped before leasing it, is leased now.
+
+        :return: Number of recovered jobs.
+        :rtype: int
+        """
+
+        items = await self.redis.lrange(self.processing, 0, -1)
+
+        if not items:
+            return 0
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for item in items:
+                pipe.zscore(self.leases, item)
+            deadlines = await pipe.execute()
+
+        now = time.time()
+        recovered = 0
+
+        for item, deadline in zip(items, deadlines):
+            if deadline is None:
+                await self.redis.zadd(self.leases, {item: now + self.visibility_timeout}, nx=True)
+            elif deadline < now and await self.redis.lrem(self.processing, 1, item):
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    await pipe.lpush(self.outbound, item).zrem(self.leases, item).execute()
+                recovered += 1
+
+        return recovered
+
+    async def schedule_retry(self, job: dict, delay: float) -> None:
+        """
+        Schedules a failed job to be queued again after a delay.
+
+        :param job: Job data.
+        :type job: dict
+        :param delay: Delay in seconds.
+        :type delay: float
+        """
+
+        await self.redis.zadd(self.retry, {json.dumps(job): time.time() + delay})
+
+    async def bury(self, job: dict) -> None:
+        """
+        Moves a job that ran out of attempts to the dead letter list.
+
+        :param job: Job data.
+        :type job: dict
+        """
+
+        await self.redis.rpush(self.dead, json.dumps(job))
+
+    async def requeue_due(self, count: int) -> int:
+        """
+        Moves retries whose delay has passed back to the outbound queue.
+
+        :param count: Maximum number of jobs to move.
+        :type count: int
+        :return: Number of moved jobs.
+        :rtype: int
+        """
+
+        moved = 0
+
+        for item in await self.redis.zrangebyscore(self.retry, "-inf", time.time(), start = 0, num = count):
+            if await self.redis.zrem(self.retry, item):
+                await self.redis.rpush(self.outbound, item)
+                moved += 1
+
+        return moved
+
+
+smtp_pool = SMTPPool.from_config(conf, settings.mail_pool_size)
+mail_queue = MailQueue(settings.mail_visibility_timeout)
+templates = TemplateRegistry(conf.TEMPLATE_FOLDER)
+
+
+async def render_email(email: str, username: str, host: str) -> MIMEText:
+    """
+    Builds the email verification message.
+
+    The message uses the ``compat32`` policy, whose headers are stored as plain strings; the default policy
+    parses every header on assignment and took most of the time of building a message.
+
+    :param email: Email address of the recipient.
+    :type email: str
+    :param username: Username of the recipient.
+    :type username: str
+    :param host: Host URL for email verification link.
+    :type host: str
+    :return: Email message.
+    :rtype: MIMEText
+    """
+
+    token_verification = await auth_service.create_email_token({"sub": email})
+
+    message = MIMEText(
+        templates.render("email_verification.html", host = host, username = username, token = token_verification),
+        "html",
+        "utf-8"
+    )
+    message["Subject"] = "Confirm your email"
+    message["From"] = formataddr((conf.MAIL_FROM_NAME, conf.MAIL_FROM))
+    message["To"] = email
+    return message
+
+
+async def deliver_email(email: str, username: str, host: str) -> None:
+    """
+    Renders and sends the verification email over the SMTP pool.
+
+    :param email: Email address of the recipient.
+    :type email: str
+    :param username: Username of the recipient.
+    :type username: str
+    :param host: Host URL for email verification link.
+    :type host: str
+    """
+
+    await smtp_pool.send(await render_email(email, username, host))
+
+
 async def send_email(email: EmailStr, username: str, host: str):
     """
-    Sends an email for email verification.
+    Queues an email for email verification.
+
+    The mail worker sends queued emails; without a Redis connection the email is sent right away.
 
     :param email: Email address of the recipient.
     :type email: EmailStr
@@ -33,18 +361,11 @@ async def send_email(email: EmailStr, username: str, host: str):
     :param host: Host URL for email verification link.
     :type host: str
     """
-    
-    try:
-        token_verification = await auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
 
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_verification.html")
-    except ConnectionErrors as err:
+    try:
+        if mail_queue.redis is None:
+            await deliver_email(email, username, str(host))
+        else:
+            await mail_queue.enqueue({"email": email, "username": username, "host": str(host), "attempts": 0})
+    except (RedisError, aiosmtplib.SMTPException, OSError) as err:
         print(err)
-
@@ -0,0 +1,29 @@
+from functools import lru_cache
+import hashlib
+
+
+@lru_cache(maxsize=4096)
+def email_hash(email: str) -> str:
+    """
+    Returns the MD5 hex digest Gravatar uses to identify an email address.
+
+    :param email: Normalized email address.
+    :type email: str
+    :return: MD5 hex digest.
+    :rtype: str
+    """
+
+    return hashlib.md5(email.encode("utf-8")).hexdigest()
+
+
+def gravatar_url(email: str) -> str:
+    """
+    Builds the Gravatar image URL for an email address, the same URL ``libgravatar.Gravatar.get_image`` returns.
+
+    :param email: Email address.
+    :type email: str
+    :return: Gravatar image URL.
+    :rtype: str
+    """
+
+    return f"https://www.gravatar.com/avatar/{email_hash(email.strip().lower())}"
@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+import threading
+import asyncio
+
+from passlib.context import CryptContext
+
+from src.services.metrics import PASSWORD_HASH_LATENCY
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool so the event loop stays free.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+
+    def _call(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Executes a passlib call inside a worker thread and keeps the counters up to date.
+
+        :param func: Function to execute.
+        :type func: Callable[..., Any]
+        :param args: Positional arguments for the function.
+        :type args: tuple
+        :return: Result of the function.
+        :rtype: Any
+        """
+
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Schedules a passlib call on the pool and waits for its result.
+
+        :param func: Function to execute.
+        :type func: Callable[..., Any]
+        :param args: Positional arguments for the function.
+        :type args: tuple
+        :return: Result of the function.
+        :rtype: Any
+        """
+
+        with self._lock:
+            self.queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._call, func, *args)
+
+    async def hash(self, password: str) -> str:
+        """
+        Generates a hashed version of the provided password.
+
+        :param password: Password to hash.
+        :type password: str
+        :return: Hashed password.
+        :rtype: str
+        """
+
+        with PASSWORD_HASH_LATENCY.labels("hash").time():
+            return await self.run(self.pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify whether the provided plain password matches the hashed password.
+
+        :param plain_password: Plain text password.
+        :type plain_password: str
+        :param hashed_password: Hashed password.
+        :type hashed_password: str
+        :return: Boolean indicating whether the passwords match.
+        :rtype: bool
+        """
+
+        with PASSWORD_HASH_LATENCY.labels("verify").time():
+            return await self.run(self.pwd_context.verify, plain_password, hashed_password)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the current state of the pool.
+
+        :return: Worker limit, queue depth, running and completed job counts.
+        :rtype: dict[str, int]
+        """
+
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed
+            }
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker threads.
+        """
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,133 @@
+import logging
+import asyncio
+
+import redis.asyncio as redis
+import aiosmtplib
+
+from src.services.email import MailQueue, SMTPPool, mail_queue, smtp_pool, templates, render_email
+from src.conf.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+class MailWorker:
+    """
+    Drains the mail queue in batches and delivers the messages over a pooled SMTP connection.
+
+    Failed messages are retried with exponential backoff and moved to the dead letter list
+    after ``max_attempts`` attempts. A job is acknowledged only after it was sent, scheduled for a retry
+    or buried; a job whose handling failed otherwise stays in the processing list until its lease expires
+    and ``recover`` puts it back, which is safe to run while other workers are processing.
+    """
+
+    def __init__(self, queue: MailQueue, pool: SMTPPool, batch_size: int, max_attempts: int, backoff: float) -> None:
+        self.queue = queue
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.running = False
+
+    async def deliver(self, job: dict) -> bool:
+        """
+        Sends one queued email and schedules a retry if it fails.
+
+        :param job: Job data.
+        :type job: dict
+        :return: Whether the email was sent.
+        :rtype: bool
+        """
+
+        try:
+            await self.pool.send(await render_email(job["email"], job["username"], job["host"]))
+            return True
+        except (aiosmtplib.SMTPException, OSError):
+            logger.warning("sending mail to %s failed", job["email"], exc_info = True)
+
+        job["attempts"] = job.get("attempts", 0) + 1
+
+        if job["attempts"] >= self.max_attempts:
+            await self.queue.bury(job)
+        else:
+            await self.queue.schedule_retry(job, self.backoff * 2 ** (job["attempts"] - 1))
+        return False
+
+    async def run_once(self, timeout: float = 1) -> int:
+        """
+        Requeues due retries and jobs with expired leases, then takes one batch from the queue and delivers it.
+
+        :param timeout: Seconds to wait for a job when the queue is empty.
+        :type timeout: float
+        :return: Number of processed jobs.
+        :rtype: int
+        """
+
+        recovered = await self.queue.recover()
+        if recovered:
+            logger.warning("recovered %d unacknowledged mail jobs", recovered)
+
+        await self.queue.requeue_due(self.batch_size)
+        jobs = await self.queue.pop(self.batch_size, timeout)
+        results = await asyncio.gather(*(self.process(item, job) for item, job in jobs), return_exceptions = True)
+
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("mail job failed", exc_info = result)
+
+        return len(jobs)
+
+    async def process(self, item: bytes, job: dict) -> None:
+        """
+        Delivers one job and acknowledges it.
+
+        :param item: Raw item returned by ``MailQueue.pop``.
+        :type item: bytes
+        :param job: Job data.
+        :type job: dict
+        """
+
+        await self.deliver(job)
+        await self.queue.ack(item)
+
+    async def run(self) -> None:
+        """
+        Processes batches until ``stop`` is called.
+
+        Errors such as a lost Redis connection are logged and retried after ``backoff`` seconds.
+        """
+
+        self.running = True
+
+        while self.running:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("mail worker batch failed")
+                await asyncio.sleep(self.backoff)
+
+    def stop(self) -> None:
+        self.running = False
+
+
+async def main() -> None:
+    templates.load()
+    r = redis.Redis(host = settings.redis_host, port = settings.redis_port)
+    await mail_queue.init(r)
+
+    worker = MailWorker(
+        queue = mail_queue,
+        pool = smtp_pool,
+        batch_size = settings.mail_batch_size,
+        max_attempts = settings.mail_max_attempts,
+        backoff = settings.mail_retry_backoff
+    )
+
+    try:
+        await worker.run()
+    finally:
+        await smtp_pool.close()
+        await r.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
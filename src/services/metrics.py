@@ -0,0 +1,204 @@
+from contextvars import ContextVar
+from typing import Callable, Iterable
+from functools import wraps
+from time import perf_counter
+import inspect
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from fastapi_limiter import http_default_callback
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette.requests import Request
+from starlette.responses import Response
+from sqlalchemy import Engine, event
+
+from src.services.queries import record_query
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route, until the last body chunk is sent.",
+    ["method", "route", "status"]
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed, by repository method.", ["method"])
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "SQL statement latency, by repository method.", ["method"])
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds",
+    "bcrypt hash and verify latency, including the wait for a worker thread.",
+    ["operation"],
+    buckets = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+JWT_DECODE_LATENCY = Histogram(
+    "jwt_decode_duration_seconds",
+    "Access token verification latency, by verified-token cache result.",
+    ["cache"],
+    buckets = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005)
+)
+SMTP_SEND_LATENCY = Histogram("smtp_send_duration_seconds", "SMTP send latency, by result.", ["result"])
+RATE_LIMIT_REJECTIONS = Counter("rate_limit_rejections_total", "Requests rejected by the rate limiter, by route.", ["route"])
+
+db_method: ContextVar[str] = ContextVar("db_method", default="other")
+
+
+def route_name(scope: Scope) -> str:
+    """
+    Returns the path template of the route that handled a request.
+
+    :param scope: ASGI scope.
+    :type scope: Scope
+    :return: Route path template, or ``unmatched``.
+    :rtype: str
+    """
+
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records request latency per route, including the time spent streaming the body.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.labels(scope["method"], route_name(scope), str(status)).observe(perf_counter() - start)
+
+
+async def rate_limit_callback(request: Request, response: Response, pexpire: int):
+    """
+    Counts a rate-limited request and raises the default 429 response.
+
+    :param request: Rejected request.
+    :type request: Request
+    :param response: Response object.
+    :type response: Response
+    :param pexpire: Milliseconds until the limit resets.
+    :type pexpire: int
+    """
+
+    RATE_LIMIT_REJECTIONS.labels(route_name(request.scope)).inc()
+    return await http_default_callback(request, response, pexpire)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Records the count and latency of every SQL statement, labelled with the running repository method,
+    and adds it to the per-request query stats.
+
+    :param engine: Sync engine.
+    :type engine: Engine
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - conn.info["query_start"].pop()
+        method = db_method.get()
+        DB_QUERIES.labels(method).inc()
+        DB_QUERY_LATENCY.labels(method).observe(elapsed)
+        record_query(statement, elapsed, executemany)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None and context.connection.info.get("query_start"):
+            context.connection.info["query_start"].pop()
+
+
+def instrument_repository(cls: type) -> type:
+    """
+    Labels the SQL statements run by each public repository method with ``Class.method``.
+
+    :param cls: Repository class.
+    :type cls: type
+    :return: The same class.
+    :rtype: type
+    """
+
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        if inspect.isasyncgenfunction(method) or inspect.iscoroutinefunction(method):
+            setattr(cls, name, labelled(method, f"{cls.__name__}.{name}"))
+
+    return cls
+
+
+def labelled(method: Callable, label: str) -> Callable:
+    """
+    Wraps a coroutine or async generator function so it runs with ``db_method`` set to ``label``.
+
+    :param method: Function to wrap.
+    :type method: Callable
+    :param label: Metric label.
+    :type label: str
+    :return: Wrapped function.
+    :rtype: Callable
+    """
+
+    if inspect.isasyncgenfunction(method):
+        @wraps(method)
+        async def generator(*args, **kwargs):
+            items = method(*args, **kwargs)
+            try:
+                while True:
+                    token = db_method.set(label)
+                    try:
+                        item = await items.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        db_method.reset(token)
+                    yield item
+            finally:
+                await items.aclose()
+        return generator
+
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = db_method.set(label)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            db_method.reset(token)
+    return wrapper
+
+
+class StatsCollector:
+    """
+    Exposes the numbers returned by a ``stats()`` callable as gauges, or as counters for the names in ``counters``.
+    """
+
+    def __init__(self, prefix: str, stats: Callable[[], dict], counters: Iterable[str] = ()) -> None:
+        self.prefix = prefix
+        self.stats = stats
+        self.counters = set(counters)
+
+    def collect(self):
+        for name, value in self.stats().items():
+            if not isinstance(value, (int, float)):
+                continue
+            if name in self.counters:
+                yield CounterMetricFamily(f"{self.prefix}_{name}", f"{self.prefix} {name}", value = value)
+            else:
+                yield GaugeMetricFamily(f"{self.prefix}_{name}", f"{self.prefix} {name}", value = value)
@@ -0,0 +1,122 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette.datastructures import MutableHeaders
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    Number, total time and repetitions of the SQL statements run while it is active.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float, executemany: bool = False) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if not executemany:
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Returns the statements run at least ``threshold`` times, the usual sign of an N+1 query.
+
+        :param threshold: Minimum number of runs.
+        :type threshold: int
+        :return: (statement, runs) pairs, most repeated first.
+        :rtype: list[tuple[str, int]]
+        """
+
+        return [(statement, runs) for statement, runs in self.statements.most_common() if runs >= threshold]
+
+
+request_queries: ContextVar[QueryStats | None] = ContextVar("request_queries", default=None)
+recorders: list[QueryStats] = []
+
+
+def record_query(statement: str, seconds: float, executemany: bool = False) -> None:
+    """
+    Adds a statement to the current request's stats and to every active ``count_queries`` block.
+
+    :param statement: SQL statement.
+    :type statement: str
+    :param seconds: Execution time.
+    :type seconds: float
+    :param executemany: Whether the statement ran as one batch of many rows; batches are not counted as repetitions.
+    :type executemany: bool
+    """
+
+    stats = request_queries.get()
+    if stats is not None:
+        stats.record(statement, seconds, executemany)
+    for recorder in recorders:
+        recorder.record(statement, seconds, executemany)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Counts every SQL statement run inside the block, from any thread or request.
+
+    :return: Stats filled in while the block runs.
+    :rtype: Iterator[QueryStats]
+    """
+
+    stats = QueryStats()
+    recorders.append(stats)
+    try:
+        yield stats
+    finally:
+        recorders.remove(stats)
+
+
+class QueryCounterMiddleware:
+    """
+    ASGI middleware that counts and times the SQL statements of each request.
+
+    In debug mode the totals are added as ``X-DB-Queries`` and ``X-DB-Query-Time`` response headers,
+    covering the statements run before the response starts, and each request is logged with its totals.
+    Statements repeated ``n_plus_one_threshold`` times or more are logged as possible N+1 queries.
+    """
+
+    def __init__(self, app: ASGIApp, debug: bool = False, n_plus_one_threshold: int = 5) -> None:
+        self.app = app
+        self.debug = debug
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = request_queries.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            if self.debug and message["type"] == "http.response.start":
+                headers = MutableHeaders(scope = message)
+                headers["X-DB-Queries"] = str(stats.count)
+                headers["X-DB-Query-Time"] = f"{stats.seconds * 1000:.2f}ms"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_queries.reset(token)
+
+            if self.debug:
+                logger.info("%s %s db_queries=%d db_time_ms=%.2f",
+                            scope["method"], scope["path"], stats.count, stats.seconds * 1000)
+
+            for statement, runs in stats.repeated(self.n_plus_one_threshold):
+                logger.warning("possible N+1 in %s %s: %d runs of %s", scope["method"], scope["path"], runs, statement)
@@ -0,0 +1,269 @@
+from typing import Any
+import hashlib
+import time
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.routing import on_replica
+from src.conf.config import settings
+
+
+class ResponseCache:
+    """
+    Caches serialized JSON responses of contact reads per user in Redis.
+
+    Cache keys include the user's contacts generation, a counter bumped by every contact write, so a write
+    makes all earlier entries unreachable and they simply expire. A response computed while a write is in
+    flight is stored under the generation read before the query, which the write has already left behind.
+
+    The same key gives the strong ``ETag`` of the response, so a request whose ``If-None-Match`` still matches
+    is answered with 304 Not Modified from the generation alone, without reading or serializing contacts.
+
+    A response read from a replica may predate the write that started the generation, so it is stored under
+    a separate key for only ``replica_ttl`` seconds and sent without an ``ETag``, which would otherwise keep
+    a stale copy valid for the whole generation.
+    """
+
+    def __init__(self, ttl: int, replica_ttl: int) -> None:
+        self.ttl = ttl
+        self.replica_ttl = replica_ttl
+        self.redis: Redis | None = None
+
+    async def init(self, redis: Redis) -> None:
+        """
+        Attaches the shared Redis connection.
+
+        :param redis: Redis connection.
+        :type redis: Redis
+        """
+
+        self.redis = redis
+
+    def generation_key(self, user_id: int) -> str:
+        return f"contacts:generation:{user_id}"
+
+    async def generation(self, user_id: int) -> int | None:
+        """
+        Returns the user's contacts generation, starting it at the current time in nanoseconds if it is missing,
+        so an evicted counter never comes back with a value that earlier entries were stored under.
+
+        :param user_id: ID of the user.
+        :type user_id: int
+        :return: Generation, or None if Redis is unavailable.
+        :rtype: int | None
+        """
+
+        if self.redis is None:
+            return None
+
+        key = self.generation_key(user_id)
+
+        try:
+            value = await self.redis.get(key)
+            if value is None:
+                await self.redis.set(key, time.time_ns(), nx=True)
+                value = await self.redis.get(key)
+        except RedisError:
+            return None
+
+        return int(value)
+
+    async def bump(self, user_id: int) -> None:
+        """
+        Moves the user's contacts generation forward, invalidating every cached response of the user.
+
+        :param user_id: ID of the user.
+        :type user_id: int
+        """
+
+        if self.redis is None:
+            return
+
+        key = self.generation_key(user_id)
+
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.set(key, time.time_ns(), nx=True).incr(key).execute()
+        except RedisError:
+            pass
+
+    async def key(self, user_id: int, request: Request, *extra: Any) -> str | None:
+        """
+        Builds the cache key of a request from the route, its path and query parameters and the user's generation.
+
+        :param user_id: ID of the user.
+        :type user_id: int
+        :param request: Incoming request.
+        :type request: Request
+        :param extra: Other values the response depends on.
+        :type extra: Any
+        :return: Cache key, or None if Redis is unavailable.
+        :rtype: str | None
+        """
+
+        generation = await self.generation(user_id)
+
+        if generation is None:
+            return None
+
+        route = request.scope.get("route")
+        params = sorted(request.query_params.multi_items())
+        digest = hashlib.sha256(repr((getattr(route, "path", request.url.path), request.path_params, params, extra)).encode()).hexdigest()
+        return f"contacts:response:{user_id}:{generation}:{digest}"
+
+    def etag(self, key: str) -> str:
+        """
+        Returns the strong entity tag of the response stored under a key.
+
+        :param key: Cache key.
+        :type key: str
+        :return: Quoted entity tag.
+        :rtype: str
+        """
+
+        return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+    def replica_key(self, key: str) -> str:
+        return f"{key}:replica"
+
+    def headers(self, key: str | None) -> dict[str, str]:
+        if key is None:
+            return {}
+        return {"ETag": self.etag(key), "Cache-Control": "private, no-cache"}
+
+    def not_modified(self, request: Request, key: str) -> bool:
+        """
+        Checks whether the request's ``If-None-Match`` header lists the entity tag of a key.
+
+        ``*`` is not handled here: it only matches when a representation exists, which ``matches_any`` checks
+        once the resource has been found.
+
+        :param request: Incoming request.
+        :type request: Request
+        :param key: Cache key.
+        :type key: str
+        :return: True if the client's copy is current.
+        :rtype: bool
+        """
+
+        header = request.headers.get("if-none-match")
+
+        if not header:
+            return False
+
+        etag = self.etag(key)
+        return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+    def matches_any(self, request: Request) -> bool:
+        """
+        Checks whether the request sends ``If-None-Match: *``, which any existing representation matches.
+
+        :param request: Incoming request.
+        :type request: Request
+        :return: True if the header is ``*``.
+        :rtype: bool
+        """
+
+        return request.headers.get("if-none-match", "").strip() == "*"
+
+    async def get(self, key: str | None, request: Request) -> Response | None:
+        """
+        Returns 304 Not Modified if the client's copy is current, otherwise the cached response for a key.
+
+        A response read from the primary is preferred over one read from a replica. A cached response means the
+        resource exists, so it also answers ``If-None-Match: *`` with 304. A request sent with
+        ``Cache-Control: no-cache`` always misses, but still refreshes the entry.
+
+        :param key: Cache key.
+        :type key: str | None
+        :param request: Incoming request.
+        :type request: Request
+        :return: Empty 304 or JSON response, or None on a miss.
+        :rtype: Response | None
+        """
+
+        if key is None or "no-cache" in request.headers.get("cache-control", ""):
+            return None
+
+        if self.not_modified(request, key):
+            return Response(status_code = status.HTTP_304_NOT_MODIFIED, headers = self.headers(key))
+
+        try:
+            body, replica_body = await self.redis.mget(key, self.replica_key(key))
+        except RedisError:
+            return None
+
+        if body is None and replica_body is None:
+            return None
+
+        headers = self.headers(key) if body is not None else {"Cache-Control": "private, no-cache"}
+
+        if self.matches_any(request):
+            return Response(status_code = status.HTTP_304_NOT_MODIFIED, headers = headers)
+
+        return Response(content = body or replica_body, media_type = "application/json", headers = headers)
+
+    async def respond(self, key: str | None, model: type[BaseModel], data: Any, request: Request, db: AsyncSession) -> Response:
+        """
+        Serializes data with a response model, stores the bytes under the key and returns them.
+
+        :param key: Cache key.
+        :type key: str | None
+        :param model: Response model.
+        :type model: type[BaseModel]
+        :param data: Response data; ORM objects are read through their attributes.
+        :type data: Any
+        :param request: Incoming request.
+        :type request: Request
+        :param db: Session the data was read with.
+        :type db: AsyncSession
+        :return: JSON response, or empty 304 for ``If-None-Match: *``.
+        :rtype: Response
+        """
+
+        body = model.model_validate(data, from_attributes = True).model_dump_json().encode()
+        return await self.store(key, body, request, db)
+
+    async def store(self, key: str | None, body: bytes, request: Request, db: AsyncSession) -> Response:
+        """
+        Stores an already serialized JSON body under the key and returns it.
+
+        Routes call this only once the resource has been found, so ``If-None-Match: *`` is answered with 304
+        here whether or not the response was cached before.
+
+        :param key: Cache key.
+        :type key: str | None
+        :param body: JSON body.
+        :type body: bytes
+        :param request: Incoming request.
+        :type request: Request
+        :param db: Session the body was read with.
+        :type db: AsyncSession
+        :return: JSON response, or empty 304 for ``If-None-Match: *``.
+        :rtype: Response
+        """
+
+        headers = {}
+
+        if key is not None:
+            if on_replica(db):
+                key, ttl, headers = self.replica_key(key), self.replica_ttl, {"Cache-Control": "private, no-cache"}
+            else:
+                ttl, headers = self.ttl, self.headers(key)
+
+            try:
+                await self.redis.set(key, body, ex=ttl)
+            except RedisError:
+                pass
+
+        if self.matches_any(request):
+            return Response(status_code = status.HTTP_304_NOT_MODIFIED, headers = headers)
+
+        return Response(content = body, media_type = "application/json", headers = headers)
+
+
+response_cache = ResponseCache(ttl = settings.response_cache_ttl, replica_ttl = settings.response_cache_replica_ttl)
@@ -0,0 +1,30 @@
+from typing import Iterable, Sequence
+
+from sqlalchemy import Row
+import orjson
+
+from src.schemas import ContactResponse
+
+
+CONTACT_FIELDS = tuple(ContactResponse.model_fields)
+
+
+def contacts_json(rows: Iterable[Row | Sequence], next_cursor: int | None = None) -> bytes:
+    """
+    Serializes contact rows into the JSON body of ``ListContactsResponse`` without validating them again.
+
+    Rows are read straight from the database, where every contact was validated on write, so they skip
+    the ``EmailStr`` and phone number validators and go to orjson as plain dicts.
+
+    :param rows: Contact column tuples in ``CONTACT_FIELDS`` order.
+    :type rows: Iterable[Row | Sequence]
+    :param next_cursor: Number of the last returned contact if there are more.
+    :type next_cursor: int | None
+    :return: JSON body.
+    :rtype: bytes
+    """
+
+    return orjson.dumps({
+        "contacts": [dict(zip(CONTACT_FIELDS, row)) for row in rows],
+        "next_cursor": next_cursor
+    })
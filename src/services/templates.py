@@ -0,0 +1,90 @@
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape, nodes
+from markupsafe import escape
+
+
+class TemplateRegistry:
+    """
+    Loads and compiles the email templates once, at startup.
+
+    Templates made only of static text and plain ``{{ variable }}`` substitutions are also split into
+    their static fragments, so rendering them is a single string join. Any other template is rendered
+    by its compiled Jinja code.
+    """
+
+    def __init__(self, folder: Path) -> None:
+        self.env = Environment(loader=FileSystemLoader(folder), autoescape=select_autoescape(), auto_reload=False)
+        self.templates: dict[str, Template] = {}
+        self.fragments: dict[str, tuple[list[str], list[str], bool]] = {}
+
+    def load(self) -> None:
+        """
+        Compiles every template in the folder.
+        """
+
+        for name in self.env.list_templates():
+            self.templates[name] = self.env.get_template(name)
+            split = self.split(name)
+            if split is not None:
+                self.fragments[name] = split
+
+    def split(self, name: str) -> tuple[list[str], list[str], bool] | None:
+        """
+        Splits a template into static fragments and the variable names between them.
+
+        :param name: Template name.
+        :type name: str
+        :return: Static fragments, variable names and whether values are escaped, or None if the template
+            uses anything beyond plain variable substitution.
+        :rtype: tuple[list[str], list[str], bool] | None
+        """
+
+        source = self.env.loader.get_source(self.env, name)[0]
+        static = [""]
+        names = []
+
+        for node in self.env.parse(source).body:
+            if not isinstance(node, nodes.Output):
+                return None
+            for child in node.nodes:
+                if isinstance(child, nodes.TemplateData):
+                    static[-1] += child.data
+                elif isinstance(child, nodes.Name):
+                    names.append(child.name)
+                    static.append("")
+                else:
+                    return None
+
+        autoescape = self.env.autoescape(name) if callable(self.env.autoescape) else self.env.autoescape
+        return static, names, autoescape
+
+    def render(self, name: str, **context) -> str:
+        """
+        Renders a compiled template.
+
+        :param name: Template name.
+        :type name: str
+        :param context: Template variables.
+        :return: Rendered template.
+        :rtype: str
+        """
+
+        if not self.templates:
+            self.load()
+
+        split = self.fragments.get(name)
+
+        if split is None:
+            template = self.templates.get(name) or self.env.get_template(name)
+            return template.render(**context)
+
+        static, names, autoescape = split
+        parts = [static[0]]
+
+        for variable, text in zip(names, static[1:]):
+            value = context.get(variable, "")
+            parts.append(escape(value) if autoescape else str(value))
+            parts.append(text)
+
+        return "".join(parts)
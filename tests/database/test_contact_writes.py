@@ -0,0 +1,102 @@
+import unittest
+import tempfile
+
+from datetime import date, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.database.models import Base, Contacts, Users
+from src.repository.contacts import ContactsDB
+from src.schemas import ContactModel, ContactUpsert, ContactsBatch
+
+
+class TestContactWrites(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{self.folder.name}/contacts.db")
+
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        self.session_maker = async_sessionmaker(self.engine, class_ = AsyncSession, expire_on_commit = False)
+        self.user = Users(id = 1, username = "user", email = "user@test.com", password = "x", created_at = datetime.now(), contacts_seq = 1, changes_seq = 1)
+
+        async with self.session_maker() as db:
+            db.add(self.user)
+            db.add(Contacts(id = 1, number = 1, change_seq = 1, name = "Bill", surname = "Smith", email_address = "bill@test.com",
+                            phone_number = "+01234567899", birthday = date(1990, 5, 17), user = 1))
+            await db.commit()
+
+        self.contact = ContactModel(
+            name = "Steve",
+            surname = "Johnson",
+            email_address = "stevejohnson@test.com",
+            phone_number = "01234567899",
+            birthday = date(2023, 3, 17)
+        )
+
+
+    async def asyncTearDown(self):
+
+        await self.engine.dispose()
+        self.folder.cleanup()
+
+
+    async def stored(self) -> Contacts:
+
+        async with self.session_maker() as db:
+            return await db.get(Contacts, 1)
+
+
+    async def test_update_after_concurrent_delete(self):
+
+        async with self.session_maker() as writer:
+            contact_obj = await ContactsDB(db = writer).get_contact(self.user, 1)
+            await writer.commit()
+
+            async with self.session_maker() as deleter:
+                await ContactsDB(db = deleter).delete_contact(self.user, 1)
+
+            self.assertIsNone(await ContactsDB(db = writer).update_contact(self.contact, contact_obj))
+
+        contact = await self.stored()
+        self.assertIsNotNone(contact.deleted_at)
+        self.assertEqual(2, contact.change_seq)
+        self.assertEqual(("", "", ""), (contact.name, contact.email_address, contact.phone_number))
+
+
+    async def test_delete_after_concurrent_delete(self):
+
+        async with self.session_maker() as db:
+            await ContactsDB(db = db).delete_contact(self.user, 1)
+
+        async with self.session_maker() as db:
+            await ContactsDB(db = db).delete_contact(self.user, 1)
+
+        contact = await self.stored()
+        self.assertEqual(2, contact.change_seq)
+
+        async with self.session_maker() as db:
+            self.assertEqual(2, (await db.get(Users, 1)).changes_seq)
+
+
+
+    async def test_batch_after_concurrent_delete(self):
+
+        async with self.session_maker() as db:
+            await ContactsDB(db = db).delete_contact(self.user, 1)
+
+        async with self.session_maker() as db:
+            batch = ContactsBatch(upserts = [ContactUpsert(number = 1, **self.contact.model_dump()), ContactUpsert(**self.contact.model_dump())])
+            result = await ContactsDB(db = db).apply_batch(self.user, batch)
+
+        self.assertEqual([{"number": 1, "status": "not_found"}, {"number": 2, "status": "created"}], result["upserts"])
+
+        contact = await self.stored()
+        self.assertIsNotNone(contact.deleted_at)
+        self.assertEqual(("", "", ""), (contact.name, contact.email_address, contact.phone_number))
+
+if __name__ == "__main__":
+    unittest.main()
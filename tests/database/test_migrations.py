@@ -0,0 +1,63 @@
+import unittest
+
+from sqlalchemy import create_engine, inspect, text
+
+from src.database.migrations import upgrade, schema_migrations, MIGRATIONS
+from src.database.models import Base
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+
+        self.engine = create_engine("sqlite://")
+
+
+    def test_legacy_schema(self):
+
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR, email VARCHAR, "
+                              "phone_number VARCHAR, password VARCHAR, avatar VARCHAR, created_at DATETIME, "
+                              "refresh_token VARCHAR, confirmed BOOLEAN)"))
+            conn.execute(text("CREATE TABLE contacts (id INTEGER PRIMARY KEY, name VARCHAR, surname VARCHAR, "
+                              "email_address VARCHAR, phone_number VARCHAR, birthday DATE, "
+                              "additional_data VARCHAR, user INTEGER)"))
+            conn.execute(text("INSERT INTO users (id, username) VALUES (1, 'a'), (2, 'b')"))
+            conn.execute(text("INSERT INTO contacts (id, name, user) VALUES "
+                              "(1, 'a1', 1), (2, 'b1', 2), (5, 'a2', 1), (7, 'b2', 2), (9, 'a3', 1)"))
+
+        with self.engine.begin() as conn:
+            upgrade(conn)
+
+        with self.engine.connect() as conn:
+            numbers = conn.execute(text('SELECT id, "user", number FROM contacts ORDER BY id')).all()
+            self.assertEqual([(1, 1, 1), (2, 2, 1), (5, 1, 2), (7, 2, 2), (9, 1, 3)], numbers)
+
+            seqs = conn.execute(text("SELECT id, contacts_seq FROM users ORDER BY id")).all()
+            self.assertEqual([(1, 3), (2, 2)], seqs)
+
+            indexes = {idx["name"] for idx in inspect(conn).get_indexes("contacts")}
+            self.assertIn("ix_contacts_user_number", indexes)
+            self.assertIn("ix_contacts_user_change_seq", indexes)
+            self.assertNotIn("ix_contacts_user_updated_at", indexes)
+
+            changes = conn.execute(text("SELECT id, change_seq FROM contacts ORDER BY id")).all()
+            self.assertEqual([(1, 1), (2, 1), (5, 2), (7, 2), (9, 3)], changes)
+
+            seqs = conn.execute(text("SELECT id, changes_seq FROM users ORDER BY id")).all()
+            self.assertEqual([(1, 3), (2, 2)], seqs)
+
+            missing = conn.execute(text("SELECT COUNT(*) FROM contacts WHERE updated_at IS NULL OR deleted_at IS NOT NULL"))
+            self.assertEqual(0, missing.scalar_one())
+
+
+    def test_fresh_schema(self):
+
+        with self.engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            upgrade(conn)
+            upgrade(conn)
+
+        with self.engine.connect() as conn:
+            versions = conn.execute(schema_migrations.select()).all()
+            self.assertEqual([version for version, _ in MIGRATIONS], [row.version for row in versions])
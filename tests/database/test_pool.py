@@ -0,0 +1,75 @@
+import unittest
+import tempfile
+import asyncio
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import exc, text
+
+from src.database.pool import MeteredQueuePool
+
+
+class TestMeteredQueuePool(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(
+            f"sqlite+aiosqlite:///{self.folder.name}/pool.db",
+            poolclass = MeteredQueuePool,
+            pool_size = 1,
+            max_overflow = 0,
+            pool_timeout = 0.2
+        )
+        self.pool = self.engine.sync_engine.pool
+
+
+    async def asyncTearDown(self):
+
+        await self.engine.dispose()
+        self.folder.cleanup()
+
+
+    async def test_checkout_counters(self):
+
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            self.assertEqual(1, self.pool.stats()["in_use"])
+
+        stats = self.pool.stats()
+        self.assertEqual(0, stats["in_use"])
+        self.assertEqual(1, stats["checkouts"])
+        self.assertEqual(0, stats["waits"])
+
+
+    async def test_wait_and_timeout(self):
+
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+            with self.assertRaises(exc.TimeoutError):
+                async with self.engine.connect() as other:
+                    await other.execute(text("SELECT 1"))
+
+        stats = self.pool.stats()
+        self.assertEqual(1, stats["waits"])
+        self.assertEqual(1, stats["timeouts"])
+        self.assertGreaterEqual(stats["checkout_seconds_max"], 0.2)
+
+
+    async def test_wait_for_release(self):
+
+        async def hold():
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(hold(), hold())
+
+        stats = self.pool.stats()
+        self.assertEqual(2, stats["checkouts"])
+        self.assertEqual(1, stats["waits"])
+        self.assertEqual(0, stats["timeouts"])
+
+
+if __name__ == "__main__":
+    unittest.main()
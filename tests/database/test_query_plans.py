@@ -0,0 +1,71 @@
+import unittest
+
+from datetime import date
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.repository.contacts import ContactsDB
+from src.repository.users import UsersDB
+from src.database.migrations import upgrade
+from src.database.models import Base, Users
+
+
+class TestQueryPlans(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(upgrade)
+
+        self.statements = []
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self.capture)
+        self.db = async_sessionmaker(self.engine)()
+        self.user = Users(id = 1)
+
+    async def asyncTearDown(self):
+
+        await self.db.close()
+        await self.engine.dispose()
+
+    def capture(self, conn, cursor, statement, parameters, context, executemany):
+
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    async def assertIndexed(self, query):
+
+        self.statements.clear()
+        await query
+        self.assertTrue(self.statements)
+
+        async with self.engine.connect() as conn:
+            for statement, parameters in self.statements:
+                plan = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()
+                scans = [row[-1] for row in plan if row[-1].startswith("SCAN")]
+                self.assertEqual([], scans, statement)
+
+
+    async def test_contacts_queries(self):
+
+        contacts_db = ContactsDB(db = self.db)
+
+        await self.assertIndexed(contacts_db.get_contacts(user = self.user.id))
+        await self.assertIndexed(contacts_db.get_contacts(user = self.user.id, cursor = 100, limit = 10))
+        await self.assertIndexed(contacts_db.get_contact_rows(user = self.user.id, cursor = 100, limit = 10))
+        await self.assertIndexed(contacts_db.get_contacts(user = self.user.id, surname = "Smith", name = "Bill"))
+        await self.assertIndexed(contacts_db.get_contacts(user = self.user.id, email_address = "bill@test.com"))
+        await self.assertIndexed(contacts_db.get_contact(self.user, 10))
+        await self.assertIndexed(contacts_db.get_contacts_by_birthday(self.user, date(2024, 3, 10), 7))
+        await self.assertIndexed(contacts_db.get_contacts_by_birthday(self.user, date(2024, 12, 28), 7))
+        await self.assertIndexed(contacts_db.get_changes(self.user, 5, limit = 100))
+
+
+    async def test_users_queries(self):
+
+        users_db = UsersDB(db = self.db)
+
+        await self.assertIndexed(users_db.get_user(id = 1))
+        await self.assertIndexed(users_db.get_user(email = "emilyjohnson@test.com"))
+        await self.assertIndexed(users_db.get_user(username = "Emily Johnson"))
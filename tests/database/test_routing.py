@@ -0,0 +1,93 @@
+import unittest
+import tempfile
+
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.database.routing import RoutingSession, on_replica, use_primary
+from src.database.models import Base, Users
+from src.repository.users import UsersDB
+from src.schemas import UserSingupModel
+
+
+class TestRoutingSession(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.primary = create_async_engine(f"sqlite+aiosqlite:///{self.folder.name}/primary.db")
+        self.replica = create_async_engine(f"sqlite+aiosqlite:///{self.folder.name}/replica.db")
+
+        for engine, username in ((self.primary, "primary"), (self.replica, "replica")):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with AsyncSession(engine) as db:
+                db.add(Users(id = 1, username = username, email = f"{username}@test.com", password = "x", created_at = datetime.now()))
+                await db.commit()
+
+        self.session_maker = async_sessionmaker(
+            self.primary,
+            class_ = AsyncSession,
+            sync_session_class = RoutingSession,
+            replicas = [self.replica.sync_engine],
+            expire_on_commit = False
+        )
+
+
+    async def asyncTearDown(self):
+
+        await self.primary.dispose()
+        await self.replica.dispose()
+        self.folder.cleanup()
+
+
+    async def test_reads_go_to_replica(self):
+
+        async with self.session_maker() as db:
+            user = await UsersDB(db = db).get_user(id = 1)
+            users = await UsersDB(db = db).get_users()
+
+        self.assertEqual("replica", user.username)
+        self.assertEqual(["replica"], [user.username for user in users])
+
+
+    async def test_sticky_after_commit(self):
+
+        async with self.session_maker() as db:
+            user = await UsersDB(db = db).get_user(id = 1)
+            self.assertEqual("replica", user.username)
+
+            new_user = await UsersDB(db = db).create_user(UserSingupModel(username = "new", email = "new@test.com", password = "x"))
+            user = await UsersDB(db = db).get_user(email = "new@test.com")
+
+        self.assertIsNotNone(user)
+        self.assertEqual(new_user.id, user.id)
+
+
+    async def test_writes_read_primary(self):
+
+        async with self.session_maker() as db:
+            user = await UsersDB(db = db).update_avatar(1, "https://avatar")
+
+        self.assertEqual("primary", user.username)
+
+        async with self.session_maker() as db:
+            user = await UsersDB(db = db).get_user(id = 1)
+
+        self.assertEqual("replica", user.username)
+
+
+
+    async def test_on_replica(self):
+
+        async with self.session_maker() as db:
+            self.assertTrue(on_replica(db))
+            use_primary(db)
+            self.assertFalse(on_replica(db))
+
+        async with AsyncSession(self.primary) as db:
+            self.assertFalse(on_replica(db))
+
+if __name__ == "__main__":
+    unittest.main()
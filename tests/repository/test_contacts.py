@@ -1,19 +1,24 @@
 import unittest
 
 from unittest.mock import MagicMock
-from sqlalchemy.orm import Session
-from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql
+from sqlalchemy import Select
+from pydantic import ValidationError
+from datetime import date, datetime
 
 from src.database.models import Contacts, Users
 from src.repository.contacts import ContactsDB
-from src.schemas import ContactModel
+from src.schemas import ContactModel, ContactUpsert, ContactsBatch
 
 
 class TestContactsDB(unittest.IsolatedAsyncioTestCase):
     
     def setUp(self):
 
-        self.db = MagicMock(spec = Session)
+        self.db = MagicMock(spec = AsyncSession)
+        self.result = MagicMock()
+        self.db.execute.return_value = self.result
         self.user = Users(id = 1)
         self.contacts = [
             Contacts(id = 0, user = self.user.id),
@@ -25,52 +30,158 @@ class TestContactsDB(unittest.IsolatedAsyncioTestCase):
 
     async def test_get_contacts_objects(self):
 
-        self.db.query().all.return_value = self.contacts
         result = await ContactsDB(db = self.db).get_contacts_objects()
-        self.assertEqual(self.contacts, result.all())
+        self.assertIsInstance(result, Select)
+        self.assertEqual([Contacts.__table__], result.get_final_froms())
 
 
     async def test_filter_objects(self):
 
-        self.db.query().filter().all.return_value = self.contacts[1:3]
-        result = await ContactsDB(db = self.db).filter_objects(self.db.query(), name = "Bill")
-        self.assertEqual(self.contacts[1:3], result.all())
+        objects = await ContactsDB(db = self.db).get_contacts_objects()
 
-        self.db.query().filter().all.return_value = [self.contacts[2]]
-        result = await ContactsDB(db = self.db).filter_objects(self.db.query(), surname = "Smith")
-        self.assertEqual([self.contacts[2]], result.all())
+        result = await ContactsDB(db = self.db).filter_objects(objects, name = "Bill")
+        self.assertIn("contacts.name = :name_1", str(result))
 
-        self.db.query().all.return_value = self.contacts
-        result = await ContactsDB(db = self.db).filter_objects(self.db.query())
-        self.assertEqual(self.contacts, result.all())
+        result = await ContactsDB(db = self.db).filter_objects(objects, name = "Bill", surname = "Smith")
+        self.assertIn("contacts.name = :name_1 AND contacts.surname = :surname_1", str(result))
+
+        result = await ContactsDB(db = self.db).filter_objects(objects, name = "", unknown = "value")
+        self.assertEqual(str(objects), str(result))
+        self.assertIn("contacts.deleted_at IS NULL", str(result))
 
 
     async def test_get_contacts(self):
 
-        self.db.query().all.return_value = []
+        self.result.scalars().all.return_value = []
         result = await ContactsDB(db = self.db).get_contacts()
         self.assertEqual([], result)
 
-        self.db.query().filter().all.return_value = [self.contacts[0]]
+        self.result.scalars().all.return_value = [self.contacts[0]]
         result = await ContactsDB(db = self.db).get_contacts(user = self.user.id)
         self.assertEqual([self.contacts[0]], result)
         
-        self.db.query().filter().filter().all.return_value = []
+        self.result.scalars().all.return_value = []
         result = await ContactsDB(db = self.db).get_contacts(user = self.user.id, surname = "Smith")
         self.assertEqual([], result)
 
 
+    async def test_get_contact_rows(self):
+
+        self.result.all.return_value = [("Bill", "Smith", "bill@test.com", "+01234567899", date(1990, 1, 1), None, 2, 2)]
+        result = await ContactsDB(db = self.db).get_contact_rows(user = self.user.id, cursor = 1, limit = 10)
+        self.assertEqual(self.result.all.return_value, result)
+
+        statement = str(self.db.execute.await_args.args[0])
+        self.assertTrue(statement.startswith("SELECT contacts.name, contacts.surname, contacts.email_address, "
+                                             "contacts.phone_number, contacts.birthday, contacts.additional_data, "
+                                             "contacts.id, contacts.number \nFROM contacts"))
+        self.assertIn("contacts.deleted_at IS NULL", statement)
+        self.assertIn("contacts.number > :number_1 ORDER BY contacts.number", statement)
+
+
+    async def test_paginate(self):
+
+        objects = await ContactsDB(db = self.db).get_contacts_objects()
+
+        result = await ContactsDB(db = self.db).paginate(objects, cursor = 10, limit = 5)
+        self.assertIn("contacts.number > :number_1", str(result))
+        self.assertIn("ORDER BY contacts.number", str(result))
+        self.assertEqual(5, result._limit)
+
+        result = await ContactsDB(db = self.db).paginate(objects)
+        self.assertNotIn("contacts.number >", str(result))
+        self.assertIsNone(result._limit)
+
+
+    async def test_stream_contacts(self):
+
+        async def rows():
+            for contact in self.contacts[:2]:
+                yield contact
+
+        self.db.stream_scalars.return_value = rows()
+        result = [contact async for contact in ContactsDB(db = self.db).stream_contacts(user = self.user.id)]
+        self.assertEqual(self.contacts[:2], result)
+
+
+    async def test_search_contacts(self):
+
+        self.result.scalars().all.return_value = [self.contacts[2]]
+
+        self.db.get_bind().dialect.name = "sqlite"
+        result = await ContactsDB(db = self.db).search_contacts(self.user, "Bill Sm", offset = 10, limit = 5)
+        self.assertEqual([self.contacts[2]], result)
+        statement = self.db.execute.call_args.args[0]
+        self.assertEqual(2, str(statement).count("lower(contacts.surname) LIKE lower(:surname_"))
+        self.assertEqual(["bill%", "sm%"], [
+            value for key, value in statement.compile().params.items() if key.startswith("name_")
+        ])
+
+        self.db.get_bind().dialect.name = "postgresql"
+        result = await ContactsDB(db = self.db).search_contacts(self.user, "Bill Sm")
+        statement = self.db.execute.call_args.args[0].compile(dialect = postgresql.dialect())
+        self.assertIn("contacts.search_vector @@ to_tsquery", str(statement))
+        self.assertIn("ts_rank", str(statement))
+        self.assertIn("bill:* & sm:*", statement.params.values())
+
+        self.db.execute.reset_mock()
+        result = await ContactsDB(db = self.db).search_contacts(self.user, "  ")
+        self.assertEqual([], result)
+        self.db.execute.assert_not_awaited()
+
+
     async def test_get_contact(self):
 
-        self.db.query().filter().order_by().offset().first.return_value = self.contacts[0]
+        self.result.scalars().first.return_value = self.contacts[0]
         result = await ContactsDB(db = self.db).get_contact(user = self.user, contact_id = 0)
         self.assertEqual(self.contacts[0], result)
 
-        self.db.query().filter().order_by().offset().first.return_value = None
+        self.result.scalars().first.return_value = None
         result = await ContactsDB(db = self.db).get_contact(user = self.user, contact_id = 1)
         self.assertEqual(None, result)
 
 
+    async def test_get_changes(self):
+
+        self.result.scalars().all.return_value = [self.contacts[0]]
+        result = await ContactsDB(db = self.db).get_changes(self.user, limit = 10)
+        self.assertEqual([self.contacts[0]], result)
+        statement = self.db.execute.await_args.args[0]
+        self.assertNotIn("deleted_at IS NULL", str(statement))
+        self.assertIn("contacts.change_seq > :change_seq_1", str(statement))
+        self.assertIn("ORDER BY contacts.change_seq", str(statement))
+
+        await ContactsDB(db = self.db).get_changes(self.user, since = 5, limit = 10)
+        statement = self.db.execute.await_args.args[0]
+        self.assertEqual(5, statement.compile().params["change_seq_1"])
+
+
+    async def test_birthday_ranges(self):
+
+        contacts_db = ContactsDB(db = self.db)
+
+        self.assertEqual([(310, 317)], await contacts_db.birthday_ranges(date(2024, 3, 10), 7))
+        self.assertEqual([(1228, 1231), (101, 104)], await contacts_db.birthday_ranges(date(2024, 12, 28), 7))
+        self.assertEqual([(221, 229)], await contacts_db.birthday_ranges(date(2023, 2, 21), 7))
+        self.assertEqual([(222, 229)], await contacts_db.birthday_ranges(date(2024, 2, 22), 7))
+        self.assertEqual([(1225, 1231), (101, 229)], await contacts_db.birthday_ranges(date(2022, 12, 25), 65))
+        self.assertEqual([(101, 1231)], await contacts_db.birthday_ranges(date(2024, 3, 10), 365))
+        self.assertEqual([], await contacts_db.birthday_ranges(date(2024, 3, 10), -1))
+
+
+    async def test_get_contacts_by_birthday(self):
+
+        self.result.scalars().all.return_value = [self.contacts[0]]
+        result = await ContactsDB(db = self.db).get_contacts_by_birthday(self.user, date(2024, 12, 28), 7)
+        self.assertEqual([self.contacts[0]], result)
+        self.assertIn(" OR ", str(self.db.execute.call_args.args[0]))
+
+        self.db.execute.reset_mock()
+        result = await ContactsDB(db = self.db).get_contacts_by_birthday(self.user, date(2024, 12, 28), -1)
+        self.assertEqual([], result)
+        self.db.execute.assert_not_awaited()
+
+
     async def test_create_contact(self):
 
         contact = ContactModel(
@@ -82,7 +193,11 @@ class TestContactsDB(unittest.IsolatedAsyncioTestCase):
             additional_data = None
         )
 
+        self.result.one.return_value = (4, 9)
         result = await ContactsDB(db = self.db).create_contact(user = self.user, contact = contact)
+        self.db.commit.assert_awaited_once_with()
+        self.assertEqual(4, result.number)
+        self.assertEqual(9, result.change_seq)
         self.assertEqual(contact.name, result.name)
         self.assertEqual(contact.surname, result.surname)
         self.assertEqual(contact.email_address, result.email_address)
@@ -92,6 +207,88 @@ class TestContactsDB(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(hasattr(result, "id"))
 
 
+    async def test_create_contacts(self):
+
+        contacts = [
+            ContactModel(
+                name = name,
+                surname = "Johnson",
+                email_address = "stevejohnson@test.com",
+                phone_number = "01234567899",
+                birthday = date(2023, 3, 17)
+            )
+            for name in ("Steve", "Emily", "William")
+        ]
+
+        self.result.one.return_value = (12, 20)
+        result = await ContactsDB(db = self.db).create_contacts(user = self.user, contacts = contacts)
+        self.assertEqual(3, result)
+        rows = self.db.execute.call_args.args[1]
+        self.assertEqual([10, 11, 12], [row["number"] for row in rows])
+        self.assertEqual([18, 19, 20], [row["change_seq"] for row in rows])
+        self.assertEqual(["Steve", "Emily", "William"], [row["name"] for row in rows])
+        self.db.commit.assert_awaited_once_with()
+
+        self.db.reset_mock()
+        result = await ContactsDB(db = self.db).create_contacts(user = self.user, contacts = [])
+        self.assertEqual(0, result)
+        self.db.execute.assert_not_awaited()
+
+
+    async def test_apply_batch(self):
+
+        def upsert(number = None):
+            return ContactUpsert(
+                number = number,
+                name = "Steve",
+                surname = "Johnson",
+                email_address = "stevejohnson@test.com",
+                phone_number = "01234567899",
+                birthday = date(2023, 3, 17)
+            )
+
+        self.result.all.return_value = [(1, 10), (3, 30)]
+        self.result.one.return_value = (12, 20)
+        batch = ContactsBatch(upserts = [upsert(), upsert(1), upsert(2), upsert()], deletes = [3, 4])
+
+        result = await ContactsDB(db = self.db).apply_batch(user = self.user, batch = batch)
+        self.assertEqual([
+            {"number": 11, "status": "created"},
+            {"number": 1, "status": "updated"},
+            {"number": 2, "status": "not_found"},
+            {"number": 12, "status": "created"}
+        ], result["upserts"])
+        self.assertEqual([{"number": 3, "status": "deleted"}, {"number": 4, "status": "not_found"}], result["deletes"])
+        self.db.commit.assert_awaited_once_with()
+
+        statements = [call.args for call in self.db.execute.await_args_list]
+        self.assertEqual(5, len(statements))
+        self.assertIn("changes_seq", str(statements[0][0]))
+        self.assertIn("contacts.deleted_at IS NULL", str(statements[1][0]))
+        self.assertEqual([15, 16], [row["change_seq"] for row in statements[2][1]])
+        updates = statements[3][1]
+        self.assertEqual([10], [item["id"] for item in updates])
+        self.assertEqual("+01234567899", updates[0]["phone_number"])
+        self.assertEqual(17, updates[0]["change_seq"])
+        deletes = statements[4][1]
+        self.assertEqual([30], [item["id"] for item in deletes])
+        self.assertEqual(18, deletes[0]["change_seq"])
+        self.assertEqual("", deletes[0]["name"])
+        self.assertIsNone(deletes[0]["birthday"])
+        self.assertIsNotNone(deletes[0]["deleted_at"])
+
+
+    async def test_apply_batch_empty(self):
+
+        result = await ContactsDB(db = self.db).apply_batch(user = self.user, batch = ContactsBatch())
+        self.assertEqual({"upserts": [], "deletes": []}, result)
+        self.db.execute.assert_not_awaited()
+        self.db.commit.assert_awaited_once_with()
+
+        with self.assertRaises(ValidationError):
+            ContactsBatch(deletes = [1, 1])
+
+
     async def test_update_contact(self):
 
         contact = ContactModel(
@@ -103,7 +300,18 @@ class TestContactsDB(unittest.IsolatedAsyncioTestCase):
             additional_data = None
         )
 
+        self.result.one.return_value = (0, 7)
         result = await ContactsDB(db = self.db).update_contact(contact = contact, contact_obj = self.contacts[3])
+        self.db.commit.assert_awaited_once_with()
+        self.assertEqual(7, result.change_seq)
+        self.db.refresh.assert_any_await(self.contacts[3])
+
+        self.db.reset_mock()
+        self.contacts[2].deleted_at = datetime(2024, 3, 16)
+        self.assertIsNone(await ContactsDB(db = self.db).update_contact(contact = contact, contact_obj = self.contacts[2]))
+        self.db.rollback.assert_awaited_once_with()
+        self.db.commit.assert_not_awaited()
+        self.assertEqual("Bill", self.contacts[2].name)
         self.assertEqual(contact.name, result.name)
         self.assertEqual(contact.surname, result.surname)
         self.assertEqual(contact.email_address, result.email_address)
@@ -115,12 +323,22 @@ class TestContactsDB(unittest.IsolatedAsyncioTestCase):
 
     async def test_delete_contact(self):
 
-        self.db.query().filter().order_by().offset().first.return_value = self.contacts[0]
+        self.contacts[0].name = "Bill"
+        self.contacts[0].birthday = date(1990, 5, 17)
+        self.result.scalars().first.return_value = self.contacts[0]
+        self.result.one.return_value = (0, 7)
         result = await ContactsDB(db = self.db).delete_contact(user = self.user, contact_id = 0)
-        self.db.delete.assert_called_once_with(self.contacts[0])
+        self.db.delete.assert_not_awaited()
+        self.db.commit.assert_awaited_once_with()
+        self.assertIsNotNone(self.contacts[0].deleted_at)
+        self.assertEqual(self.contacts[0].deleted_at, self.contacts[0].updated_at)
+        self.assertEqual(7, self.contacts[0].change_seq)
+        self.assertEqual("", self.contacts[0].name)
+        self.assertIsNone(self.contacts[0].birthday)
         self.assertIsNone(result)
 
-        self.db.query().filter().order_by().offset().first.return_value = None
+        self.result.scalars().first.return_value = None
         result = await ContactsDB(db = self.db).delete_contact(user = self.user, contact_id = 1)
+        self.db.commit.assert_awaited_once_with()
+        self.db.rollback.assert_awaited_once_with()
         self.assertIsNone(result)
-        
\ No newline at end of file
@@ -1,7 +1,8 @@
 import unittest
 
 from unittest.mock import MagicMock
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select
 
 from src.repository.users import UsersDB
 from src.schemas import UserSingupModel
@@ -12,7 +13,9 @@ class TestUsersDB(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
 
-        self.db = MagicMock(spec = Session)
+        self.db = MagicMock(spec = AsyncSession)
+        self.result = MagicMock()
+        self.db.execute.return_value = self.result
         self.users = [
             Users(id = 0, refresh_token = "refresh_token"),
             Users(id = 1, username = "Emily Johnson"),
@@ -22,36 +25,36 @@ class TestUsersDB(unittest.IsolatedAsyncioTestCase):
 
     async def test_get_contacts_objects(self):
 
-        self.db.query().all.return_value = self.users
         result = await UsersDB(db = self.db).get_users_objects()
-        self.assertEqual(self.users, result.all())
+        self.assertIsInstance(result, Select)
+        self.assertEqual([Users.__table__], result.get_final_froms())
 
 
     async def test_filter_objects(self):
 
-        self.db.query().filter().all.return_value = [self.users[2]]
-        result = await UsersDB(db = self.db).filter_objects(self.db.query(), id = 2)
-        self.assertEqual([self.users[2]], result.all())
+        objects = await UsersDB(db = self.db).get_users_objects()
 
-        self.db.query().filter().all.return_value = [self.users[1]]
-        result = await UsersDB(db = self.db).filter_objects(self.db.query(), username = "Emily Johnson")
-        self.assertEqual([self.users[1]], result.all())
+        result = await UsersDB(db = self.db).filter_objects(objects, id = 2)
+        self.assertIn("users.id = :id_1", str(result))
+
+        result = await UsersDB(db = self.db).filter_objects(objects, username = "Emily Johnson")
+        self.assertIn("users.username = :username_1", str(result))
         
 
     async def test_get_users(self):
 
-        self.db.query().all.return_value = self.users
+        self.result.scalars().all.return_value = self.users
         result = await UsersDB(db = self.db).get_users()
         self.assertEqual(self.users, result)
 
 
     async def test_get_user(self):
         
-        self.db.query().filter().first.return_value = self.users[1]
+        self.result.scalars().first.return_value = self.users[1]
         result = await UsersDB(db = self.db).get_user(id = 1)
         self.assertEqual(self.users[1], result)
 
-        self.db.query().filter().first.return_value = None
+        self.result.scalars().first.return_value = None
         result = await UsersDB(db = self.db).get_user(id = 4)
         self.assertEqual(None, result)
 
@@ -66,7 +69,7 @@ class TestUsersDB(unittest.IsolatedAsyncioTestCase):
         )
 
         result = await UsersDB(db = self.db).create_user(user = user)
-        self.db.commit.assert_called_once_with()
+        self.db.commit.assert_awaited_once_with()
         self.assertEqual(user.username, result.username)
         self.assertEqual(user.email, result.email)
         self.assertEqual(user.password, result.password)
@@ -84,7 +87,7 @@ class TestUsersDB(unittest.IsolatedAsyncioTestCase):
         )
 
         result = await UsersDB(db = self.db).update_user(user = user, user_obj = self.users[3])
-        self.db.commit.assert_called_once_with()
+        self.db.commit.assert_awaited_once_with()
         self.assertEqual(self.users[3].username, result.username)
         self.assertEqual(user.email, result.email)
         self.assertEqual(user.password, result.password)
@@ -94,36 +97,36 @@ class TestUsersDB(unittest.IsolatedAsyncioTestCase):
 
     async def test_delete_user(self):
 
-        self.db.query().filter().first.return_value = self.users[2]
+        self.result.scalars().first.return_value = self.users[2]
         result = await UsersDB(db = self.db).delete_user(user_id = 2)
-        self.db.delete.assert_called_once_with(self.users[2])
-        self.db.commit.assert_called_once_with()
+        self.db.delete.assert_awaited_once_with(self.users[2])
+        self.db.commit.assert_awaited_once_with()
         self.assertIsNone(result)
 
-        self.db.query().filter().first.return_value = None
+        self.result.scalars().first.return_value = None
         result = await UsersDB(db = self.db).delete_user(user_id = 4)
-        self.db.commit.assert_called_once_with()
+        self.db.commit.assert_awaited_once_with()
         self.assertIsNone(result)
 
 
     async def test_update_token(self):
 
         result = await UsersDB(db = self.db).update_token(user = self.users[0], token = "token")
-        self.db.commit.assert_called_once_with()
+        self.db.commit.assert_awaited_once_with()
         self.assertEqual(self.users[0].refresh_token, "token")
 
 
     async def test_confirmed_email(self):
         
-        self.db.query().filter().first.return_value = self.users[2]
+        self.result.scalars().first.return_value = self.users[2]
         result = await UsersDB(db = self.db).confirmed_email(self.users[2].email)
-        self.db.commit.assert_called_once_with()
+        self.db.commit.assert_awaited_once_with()
         self.assertTrue(self.users[2].confirmed)
 
 
     async def test_update_avatar(self):
 
-        self.db.query().filter().first.return_value = self.users[1]
+        self.result.scalars().first.return_value = self.users[1]
         result = await UsersDB(db = self.db).update_avatar(user_id = 1, url = "https://avatar")
-        self.db.commit.assert_called_once_with()
+        self.db.commit.assert_awaited_once_with()
         self.assertEqual(self.users[1].avatar, "https://avatar")
@@ -85,11 +85,12 @@ def test_email_is_already_confirmed(client, user):
     assert data["message"] == "Your email is already confirmed"
 
 
-def test_login_user(client, user):
-    response = client.post(
-        "/api/auth/login",
-        data={"username": user.get("username"), "password": user.get("passwor")},
-    )
+def test_login_user(client, user, assert_max_queries):
+    with assert_max_queries(2):
+        response = client.post(
+            "/api/auth/login",
+            data={"username": user.get("username"), "password": user.get("passwor")},
+        )
     assert response.status_code == 200, response.text
     data = response.json()
     assert data["token_type"] == "bearer"
@@ -115,12 +116,13 @@ def test_login_wrong_username(client, user):
     assert data["detail"] == "Invalid username"
 
 
-def test_refresh_token(client, session, user):
+def test_refresh_token(client, session, user, assert_max_queries):
     user_odj: Users = session.query(Users).filter(Users.username == user.get("username")).first()
-    response = client.get(
-        "/api/auth/refresh-token",
-        headers={"Authorization": f"Bearer {user_odj.refresh_token}"},
-    )
+    with assert_max_queries(2):
+        response = client.get(
+            "/api/auth/refresh-token",
+            headers={"Authorization": f"Bearer {user_odj.refresh_token}"},
+        )
     assert response.status_code == 200, response.text
     data = response.json()
     assert data["token_type"] == "bearer"
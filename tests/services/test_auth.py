@@ -0,0 +1,54 @@
+import unittest
+
+from unittest.mock import patch
+
+from jose import JWTError, jwt
+
+from src.services.auth import Auth
+
+
+class TestTokenCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+
+        self.auth = Auth()
+
+
+    async def test_decode_once(self):
+
+        token = await self.auth.create_access_token({"sub": "1"})
+
+        with patch("src.services.auth.jwt.decode", wraps = jwt.decode) as decode:
+            first = self.auth.decode_token(token)
+            second = self.auth.decode_token(token)
+
+        self.assertEqual(1, decode.call_count)
+        self.assertEqual(first, second)
+        self.assertEqual("1", second["sub"])
+
+
+    async def test_expiry_from_exp(self):
+
+        token = await self.auth.create_access_token({"sub": "1"}, expires_delta = 60)
+        self.auth.decode_token(token)
+
+        expires_at, _ = next(iter(self.auth.tokens.data.values()))
+
+        with patch("src.services.cache.time.monotonic", return_value = expires_at):
+            with patch("src.services.auth.jwt.decode", side_effect = JWTError("expired")):
+                with self.assertRaises(JWTError):
+                    self.auth.decode_token(token)
+
+
+    async def test_invalid_token_not_cached(self):
+
+        token = await self.auth.create_access_token({"sub": "1"})
+
+        with self.assertRaises(JWTError):
+            self.auth.decode_token(token[:-2] + "xx")
+
+        self.assertEqual(0, len(self.auth.tokens.data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import tempfile
+import io
+
+from unittest.mock import AsyncMock, MagicMock, patch
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from src.services.avatars import AvatarJobs, AvatarStorage, LocalStorage, save_upload, resize, process_avatar
+
+
+def image_bytes(width: int, height: int, format: str = "JPEG") -> bytes:
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, format)
+    return buffer.getvalue()
+
+
+class TestAvatars(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.root = Path(self.folder.name)
+
+
+    def tearDown(self):
+
+        self.folder.cleanup()
+
+
+    async def test_save_upload(self):
+
+        data = image_bytes(800, 600)
+        path = await save_upload(UploadFile(io.BytesIO(data)), max_bytes = len(data))
+
+        self.assertEqual(data, path.read_bytes())
+        path.unlink()
+
+
+    async def test_save_upload_too_large(self):
+
+        with self.assertRaises(HTTPException) as e:
+            await save_upload(UploadFile(io.BytesIO(b"x" * 100)), max_bytes = 99)
+
+        self.assertEqual(413, e.exception.status_code)
+
+
+    def test_storage_must_implement_save(self):
+
+        class Incomplete(AvatarStorage):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+    def test_resize(self):
+
+        path = self.root / "avatar.upload"
+        path.write_bytes(image_bytes(800, 600))
+
+        result = resize(path, 250)
+
+        with Image.open(result) as image:
+            self.assertEqual("PNG", image.format)
+            self.assertEqual((250, 250), image.size)
+
+
+    async def test_process_avatar(self):
+
+        path = self.root / "avatar.upload"
+        path.write_bytes(image_bytes(300, 500, "PNG"))
+        jobs = AvatarJobs(ttl = 60, maxsize = 10)
+        storage = LocalStorage(self.root / "avatars", "/avatars")
+        users = MagicMock()
+        users.return_value.update_avatar = AsyncMock()
+
+        with patch("src.services.avatars.avatar_jobs", jobs), \
+             patch("src.services.avatars.avatar_storage", storage), \
+             patch("src.services.avatars.SessionLocal", MagicMock()), \
+             patch("src.services.avatars.UsersDB", users):
+            await process_avatar("job", 7, "user", path)
+
+        job = await jobs.get("job")
+        self.assertEqual("done", job["status"])
+        self.assertTrue(job["avatar"].startswith("/avatars/7.png?v="))
+        self.assertTrue((self.root / "avatars" / "7.png").exists())
+        users.return_value.update_avatar.assert_awaited_once_with(7, job["avatar"])
+        self.assertFalse(path.exists())
+
+
+    async def test_process_invalid_image(self):
+
+        path = self.root / "avatar.upload"
+        path.write_bytes(b"not an image")
+        jobs = AvatarJobs(ttl = 60, maxsize = 10)
+
+        with patch("src.services.avatars.avatar_jobs", jobs), self.assertLogs("src.services.avatars", "ERROR"):
+            await process_avatar("job", 7, "user", path)
+
+        job = await jobs.get("job")
+        self.assertEqual("failed", job["status"])
+        self.assertFalse(path.exists())
+
+
+
+    async def test_local_jobs_are_bounded(self):
+
+        jobs = AvatarJobs(ttl = 60, maxsize = 2)
+
+        for job_id in ("a", "b", "c"):
+            await jobs.set(job_id, {"status": "processing"})
+
+        self.assertIsNone(await jobs.get("a"))
+        self.assertEqual({"status": "processing"}, await jobs.get("c"))
+
+        jobs.ttl = 0
+        await jobs.set("d", {"status": "done"})
+        self.assertIsNone(await jobs.get("d"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import json
+
+from unittest.mock import AsyncMock, MagicMock, patch
+from datetime import datetime
+
+from src.services.cache import LRUCache, PrincipalCache
+from src.database.models import Users
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def setUp(self):
+
+        self.cache = LRUCache(maxsize = 2)
+
+
+    def test_eviction(self):
+
+        self.cache.set("a", 1, ttl = 60)
+        self.cache.set("b", 2, ttl = 60)
+        self.assertEqual(1, self.cache.get("a"))
+
+        self.cache.set("c", 3, ttl = 60)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(1, self.cache.get("a"))
+        self.assertEqual(3, self.cache.get("c"))
+
+
+    def test_expiry(self):
+
+        with patch("src.services.cache.time.monotonic", return_value = 100):
+            self.cache.set("a", 1, ttl = 10)
+        with patch("src.services.cache.time.monotonic", return_value = 109):
+            self.assertEqual(1, self.cache.get("a"))
+        with patch("src.services.cache.time.monotonic", return_value = 110):
+            self.assertIsNone(self.cache.get("a"))
+
+
+class TestPrincipalCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+
+        self.redis = AsyncMock()
+        self.cache = PrincipalCache(maxsize = 10, ttl = 300, local_ttl = 30)
+        self.user = Users(
+            id = 1,
+            username = "Emily Johnson",
+            email = "emilyjohnson@test.com",
+            password = "hash",
+            refresh_token = "token",
+            created_at = datetime(2024, 3, 16, 14, 10),
+            confirmed = True
+        )
+
+
+    async def test_set_and_get(self):
+
+        await self.cache.init(self.redis)
+        await self.cache.set(self.user)
+        self.redis.set.assert_awaited_once()
+
+        result = await self.cache.get(1)
+        self.assertIsNot(self.user, result)
+        self.assertEqual(self.user.username, result.username)
+        self.assertEqual(self.user.created_at, result.created_at)
+        self.assertIsNone(result.password)
+        self.assertIsNone(result.refresh_token)
+        self.redis.mget.assert_not_awaited()
+
+
+    async def test_get_from_redis(self):
+
+        await self.cache.init(self.redis)
+        entry = json.dumps({"version": 3, "user": self.cache.dump(self.user)})
+        self.redis.mget.return_value = [entry, b"3"]
+
+        result, version = await self.cache.lookup(1)
+        self.assertEqual(self.user.email, result.email)
+        self.assertEqual(3, version)
+        self.assertIsNotNone(self.cache.local.get(1))
+
+        self.redis.mget.return_value = [None, None]
+        self.assertEqual((None, 0), await self.cache.lookup(2))
+
+
+    async def test_stale_version(self):
+
+        await self.cache.init(self.redis)
+        entry = json.dumps({"version": 3, "user": self.cache.dump(self.user)})
+        self.redis.mget.return_value = [entry, b"4"]
+
+        self.assertEqual((None, 4), await self.cache.lookup(1))
+        self.assertIsNone(self.cache.local.get(1))
+
+        await self.cache.set(self.user, version = 3)
+        self.redis.set.assert_not_awaited()
+        self.assertIsNone(self.cache.local.get(1))
+
+
+    async def test_invalidate(self):
+
+        pipe = MagicMock()
+        pipe.incr.return_value = pipe
+        pipe.expire.return_value = pipe
+        pipe.delete.return_value = pipe
+        pipe.execute = AsyncMock(return_value = [5, True, 1])
+        pipeline = MagicMock()
+        pipeline.__aenter__.return_value = pipe
+        self.redis.pipeline = MagicMock(return_value = pipeline)
+
+        await self.cache.set(self.user, version = 4)
+        await self.cache.init(self.redis)
+        await self.cache.invalidate(1)
+        pipe.incr.assert_called_once_with("principal:version:1")
+        pipe.delete.assert_called_once_with("principal:1")
+        self.redis.publish.assert_awaited_once_with("principal:invalidate", "1:5")
+
+        self.redis.mget.return_value = [None, b"5"]
+        self.assertEqual((None, 5), await self.cache.lookup(1))
+
+
+    async def test_forget(self):
+
+        await self.cache.set(self.user, version = 1)
+        self.cache.forget(1, 2)
+
+        self.assertEqual((None, 2), await self.cache.lookup(1))
+        await self.cache.set(self.user, version = 1)
+        self.assertIsNone(self.cache.local.get(1))
+        await self.cache.set(self.user, version = 2)
+        self.assertEqual(self.user.email, (await self.cache.get(1)).email)
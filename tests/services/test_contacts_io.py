@@ -0,0 +1,105 @@
+import unittest
+import gzip
+import json
+import io
+
+from datetime import date
+
+from src.services.contacts_io import csv_records, vcard_records, validate_records, write_contacts
+from src.database.models import Contacts
+
+
+class TestContactsIO(unittest.TestCase):
+
+    def test_csv_records(self):
+
+        stream = io.StringIO(
+            "name,surname,email_address,phone_number,birthday,additional_data\r\n"
+            "Bill,Smith,billsmith@test.com,01234567899,1990-03-17,\r\n"
+            "Steve,Johnson,stevejohnson@test.com,01234567899,1991-04-18,\"multi\nline\"\r\n"
+        )
+        records = list(csv_records(stream))
+        self.assertEqual(2, len(records))
+        self.assertEqual((1, "Bill", None), (records[0][0], records[0][1]["name"], records[0][1]["additional_data"]))
+        self.assertEqual((2, "multi\nline"), (records[1][0], records[1][1]["additional_data"]))
+
+
+    def test_vcard_records(self):
+
+        stream = io.StringIO(
+            "BEGIN:VCARD\r\nVERSION:3.0\r\nN:Smith;Bill;;;\r\nFN:Bill Smith\r\n"
+            "EMAIL;TYPE=INTERNET:billsmith@test.com\r\nTEL;TYPE=CELL:+1 234-567-8901\r\n"
+            "BDAY:1990031\r\n 7\r\nNOTE:first\\, second\r\nEND:VCARD\r\n"
+            "BEGIN:VCARD\r\nFN:Steve Johnson\r\nEND:VCARD\r\n"
+        )
+        records = list(vcard_records(stream))
+        self.assertEqual({
+            "name": "Bill",
+            "surname": "Smith",
+            "email_address": "billsmith@test.com",
+            "phone_number": "+12345678901",
+            "birthday": "1990-03-17",
+            "additional_data": "first, second"
+        }, records[0][1])
+        self.assertEqual((2, "Steve", "Johnson"), (records[1][0], records[1][1]["name"], records[1][1]["surname"]))
+
+
+    def test_validate_records(self):
+
+        contacts, errors = validate_records([
+            (1, {"name": "Bill", "surname": "Smith", "email_address": "billsmith@test.com",
+                 "phone_number": "01234567899", "birthday": "1990-03-17", "additional_data": None}),
+            (2, {"name": "Bill", "surname": None, "email_address": "billsmith",
+                 "phone_number": "01234567899", "birthday": "1990-03-17", "additional_data": None}),
+        ])
+        self.assertEqual(1, len(contacts))
+        self.assertEqual(date(1990, 3, 17), contacts[0].birthday)
+        self.assertEqual(1, len(errors))
+        self.assertEqual(2, errors[0]["row"])
+        self.assertEqual(2, len(errors[0]["errors"]))
+
+
+class TestWriteContacts(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+
+        self.contacts = [
+            Contacts(id = 1, number = 1, name = "Bill", surname = "Smith", email_address = "billsmith@test.com",
+                     phone_number = "+01234567899", birthday = date(1990, 3, 17), additional_data = "first, second;\nthird"),
+            Contacts(id = 2, number = 2, name = "Steve", surname = "Johnson", email_address = "stevejohnson@test.com",
+                     phone_number = "+01234567899", birthday = date(1991, 4, 18), additional_data = None),
+        ]
+
+    async def export(self, format, compress = False):
+
+        async def contacts():
+            for contact in self.contacts:
+                yield contact
+
+        return b"".join([chunk async for chunk in write_contacts(contacts(), format, compress)])
+
+
+    async def test_csv_round_trip(self):
+
+        records = list(csv_records(io.StringIO((await self.export("csv")).decode(), newline = "")))
+        self.assertEqual(2, len(records))
+        self.assertEqual("first, second;\nthird", records[0][1]["additional_data"])
+        self.assertEqual("1991-04-18", records[1][1]["birthday"])
+        self.assertIsNone(records[1][1]["additional_data"])
+
+
+    async def test_vcard_round_trip(self):
+
+        records = list(vcard_records(io.StringIO((await self.export("vcard")).decode(), newline = "")))
+        self.assertEqual(2, len(records))
+        self.assertEqual(("Bill", "Smith"), (records[0][1]["name"], records[0][1]["surname"]))
+        self.assertEqual("first, second;\nthird", records[0][1]["additional_data"])
+
+
+    async def test_ndjson_gzip(self):
+
+        lines = gzip.decompress(await self.export("ndjson", compress = True)).decode().splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertEqual({"id": 1, "number": 1, "birthday": "1990-03-17"}, {
+            key: value for key, value in json.loads(lines[0]).items() if key in ("id", "number", "birthday")
+        })
@@ -0,0 +1,223 @@
+import unittest
+import asyncio
+
+from unittest.mock import AsyncMock, call, patch
+from email.message import EmailMessage
+
+from redis.exceptions import RedisError
+import aiosmtplib
+
+from src.services.email import MailQueue, SMTPPool
+from src.services.mail_worker import MailWorker
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+try:
+    from fakeredis.aioredis import FakeRedis
+except ImportError:
+    FakeRedis = None
+
+
+class Handler:
+
+    def __init__(self):
+
+        self.messages = []
+        self.sessions = set()
+
+
+    async def handle_DATA(self, server, session, envelope):
+
+        self.messages.append(envelope.rcpt_tos)
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+def message(to: str) -> EmailMessage:
+
+    msg = EmailMessage()
+    msg["From"] = "admin@example.com"
+    msg["To"] = to
+    msg["Subject"] = "Confirm your email"
+    msg.set_content("body")
+    return msg
+
+
+@unittest.skipIf(Controller is None, "aiosmtpd is not installed")
+class TestSMTPPool(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+
+        self.handler = Handler()
+        self.controller = Controller(self.handler, hostname = "127.0.0.1", port = 8025)
+        self.controller.start()
+        self.pool = SMTPPool(hostname = "127.0.0.1", port = 8025, size = 1)
+
+
+    async def asyncTearDown(self):
+
+        await self.pool.close()
+
+
+    def tearDown(self):
+
+        self.controller.stop()
+
+
+    async def test_reuses_connection(self):
+
+        for n in range(3):
+            await self.pool.send(message(f"user{n}@example.com"))
+
+        self.assertEqual(3, len(self.handler.messages))
+        self.assertEqual(1, len(self.handler.sessions))
+        self.assertEqual(1, self.pool.opened)
+
+
+    async def test_concurrent_sends_share_pool(self):
+
+        await asyncio.gather(*(self.pool.send(message(f"user{n}@example.com")) for n in range(5)))
+
+        self.assertEqual(5, len(self.handler.messages))
+        self.assertEqual(1, self.pool.opened)
+
+
+class TestMailWorker(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+
+        self.queue = AsyncMock()
+        self.queue.recover.return_value = 0
+        self.pool = AsyncMock()
+        self.worker = MailWorker(queue = self.queue, pool = self.pool, batch_size = 10, max_attempts = 3, backoff = 2)
+        self.job = {"email": "user@example.com", "username": "user", "host": "http://test/", "attempts": 0}
+        patcher = patch("src.services.mail_worker.render_email", AsyncMock(return_value = message("user@example.com")))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    async def test_run_once(self):
+
+        self.queue.pop.return_value = [(b"1", dict(self.job)), (b"2", dict(self.job))]
+
+        processed = await self.worker.run_once()
+
+        self.assertEqual(2, processed)
+        self.queue.requeue_due.assert_awaited_once_with(10)
+        self.assertEqual(2, self.pool.send.await_count)
+        self.queue.schedule_retry.assert_not_awaited()
+        self.assertEqual([call(b"1"), call(b"2")], self.queue.ack.await_args_list)
+
+
+    async def test_unexpected_error_is_not_acknowledged(self):
+
+        self.pool.send.side_effect = [ValueError("broken"), None]
+        self.queue.pop.return_value = [(b"1", dict(self.job)), (b"2", dict(self.job))]
+
+        with self.assertLogs("src.services.mail_worker", "ERROR"):
+            processed = await self.worker.run_once()
+
+        self.assertEqual(2, processed)
+        self.queue.ack.assert_awaited_once_with(b"2")
+
+
+    async def test_run_survives_errors(self):
+
+        self.worker.backoff = 0
+        self.queue.recover.side_effect = [RedisError("down"), 1, 0]
+        self.queue.requeue_due.side_effect = [RedisError("down"), 0]
+
+        async def pop(count, timeout):
+            self.worker.stop()
+            return []
+
+        self.queue.pop.side_effect = pop
+
+        with self.assertLogs("src.services.mail_worker") as logs:
+            await self.worker.run()
+
+        self.assertEqual(3, self.queue.recover.await_count)
+        self.assertEqual(2, self.queue.requeue_due.await_count)
+        self.assertEqual(3, len(logs.records))
+
+
+    async def test_retry_with_backoff(self):
+
+        self.pool.send.side_effect = aiosmtplib.SMTPServerDisconnected("gone")
+        self.job["attempts"] = 1
+
+        with self.assertLogs("src.services.mail_worker", "WARNING"):
+            sent = await self.worker.deliver(self.job)
+
+        self.assertFalse(sent)
+        self.queue.schedule_retry.assert_awaited_once_with({**self.job, "attempts": 2}, 4)
+        self.queue.bury.assert_not_awaited()
+
+
+    async def test_bury_after_max_attempts(self):
+
+        self.pool.send.side_effect = OSError("refused")
+        self.job["attempts"] = 2
+
+        sent = await self.worker.deliver(self.job)
+
+        self.assertFalse(sent)
+        self.queue.bury.assert_awaited_once_with({**self.job, "attempts": 3})
+        self.queue.schedule_retry.assert_not_awaited()
+
+
+
+@unittest.skipIf(FakeRedis is None, "fakeredis is not installed")
+class TestMailQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+
+        self.redis = FakeRedis()
+        self.queue = MailQueue(visibility_timeout = 60)
+        await self.queue.init(self.redis)
+
+        for number in range(3):
+            await self.queue.enqueue({"email": f"user{number}@example.com"})
+
+
+    async def asyncTearDown(self):
+
+        await self.redis.aclose()
+
+
+    async def test_pop_and_ack(self):
+
+        jobs = await self.queue.pop(2)
+        self.assertEqual(["user0@example.com", "user1@example.com"], [job["email"] for _, job in jobs])
+        self.assertEqual(2, await self.redis.zcard(MailQueue.leases))
+
+        await self.queue.ack(jobs[0][0])
+        self.assertEqual([jobs[1][0]], await self.redis.lrange(MailQueue.processing, 0, -1))
+        self.assertEqual(1, await self.redis.zcard(MailQueue.leases))
+
+
+    async def test_recover_only_expired_leases(self):
+
+        jobs = await self.queue.pop(2)
+        self.assertEqual(0, await self.queue.recover())
+        self.assertEqual(2, await self.redis.llen(MailQueue.processing))
+
+        await self.redis.zadd(MailQueue.leases, {jobs[0][0]: 0})
+        self.assertEqual(1, await self.queue.recover())
+        self.assertEqual([jobs[1][0]], await self.redis.lrange(MailQueue.processing, 0, -1))
+        self.assertEqual(jobs[0][0], await self.redis.lindex(MailQueue.outbound, 0))
+
+
+    async def test_recover_leases_orphans(self):
+
+        await self.redis.lmove(MailQueue.outbound, MailQueue.processing, "LEFT", "RIGHT")
+
+        self.assertEqual(0, await self.queue.recover())
+        self.assertIsNotNone(await self.redis.zscore(MailQueue.leases, b'{"email": "user0@example.com"}'))
+
+
+if __name__ == "__main__":
+    unittest.main()
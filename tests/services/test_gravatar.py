@@ -0,0 +1,30 @@
+import unittest
+
+from datetime import datetime
+
+from src.services.gravatar import email_hash, gravatar_url
+from src.schemas import UserModel
+
+
+class TestGravatar(unittest.TestCase):
+
+    def test_gravatar_url(self):
+
+        email_hash.cache_clear()
+
+        url = gravatar_url(" MyEmailAddress@example.com ")
+        self.assertEqual("https://www.gravatar.com/avatar/0bc83cb571cd1c50ba6f3e8a78ef1346", url)
+        self.assertEqual(url, gravatar_url("myemailaddress@example.com"))
+        self.assertEqual(1, email_hash.cache_info().hits)
+
+
+    def test_user_model_avatar(self):
+
+        user = {"id": 1, "username": "user", "email": "myemailaddress@example.com", "created_at": datetime.now(), "confirmed": True}
+
+        self.assertEqual(gravatar_url(user["email"]), UserModel(**user).avatar)
+        self.assertEqual("https://avatar", UserModel(**user, avatar = "https://avatar").avatar)
+
+
+if __name__ == "__main__":
+    unittest.main()
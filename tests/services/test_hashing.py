@@ -0,0 +1,39 @@
+import unittest
+import asyncio
+
+from src.services.hashing import PasswordHasher
+
+
+class TestPasswordHasher(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+
+        self.hasher = PasswordHasher(max_workers = 1)
+
+    def tearDown(self):
+
+        self.hasher.shutdown()
+
+
+    async def test_hash_and_verify(self):
+
+        hashed = await self.hasher.hash("password")
+        self.assertNotEqual("password", hashed)
+        self.assertTrue(await self.hasher.verify("password", hashed))
+        self.assertFalse(await self.hasher.verify("wrong", hashed))
+
+
+    async def test_stats(self):
+
+        jobs = [asyncio.create_task(self.hasher.hash("password")) for _ in range(3)]
+        await asyncio.sleep(0)
+        stats = self.hasher.stats()
+        self.assertEqual(1, stats["max_workers"])
+        self.assertEqual(3, stats["queued"] + stats["running"])
+        self.assertLessEqual(stats["running"], 1)
+
+        await asyncio.gather(*jobs)
+        stats = self.hasher.stats()
+        self.assertEqual(0, stats["queued"])
+        self.assertEqual(0, stats["running"])
+        self.assertEqual(3, stats["completed"])
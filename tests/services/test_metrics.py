@@ -0,0 +1,88 @@
+import unittest
+
+from prometheus_client import CollectorRegistry, REGISTRY
+from sqlalchemy.ext.asyncio import create_async_engine
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from fastapi import FastAPI
+
+from src.services.metrics import MetricsMiddleware, StatsCollector, instrument_engine, instrument_repository
+
+
+@instrument_repository
+class Repository:
+
+    def __init__(self, conn):
+
+        self.conn = conn
+
+
+    async def count(self) -> int:
+
+        result = await self.conn.execute(text("SELECT 1"))
+        return result.scalar()
+
+
+    async def rows(self):
+
+        for _ in range(2):
+            result = await self.conn.execute(text("SELECT 1"))
+            yield result.scalar()
+
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+
+    def sample(self, name: str, **labels) -> float:
+
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+
+    async def test_queries_per_repository_method(self):
+
+        engine = create_async_engine("sqlite+aiosqlite://")
+        instrument_engine(engine.sync_engine)
+        before = self.sample("db_queries_total", method = "Repository.count")
+        before_rows = self.sample("db_queries_total", method = "Repository.rows")
+
+        async with engine.connect() as conn:
+            await Repository(conn).count()
+            self.assertEqual([1, 1], [row async for row in Repository(conn).rows()])
+            await conn.execute(text("SELECT 1"))
+
+        await engine.dispose()
+
+        self.assertEqual(before + 1, self.sample("db_queries_total", method = "Repository.count"))
+        self.assertEqual(before_rows + 2, self.sample("db_queries_total", method = "Repository.rows"))
+
+
+    def test_request_latency_per_route(self):
+
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def read_item(item_id: int):
+            return {"id": item_id}
+
+        labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+        before = self.sample("http_request_duration_seconds_count", **labels)
+
+        with TestClient(app) as client:
+            client.get("/items/1")
+            client.get("/items/2")
+
+        self.assertEqual(before + 2, self.sample("http_request_duration_seconds_count", **labels))
+
+
+    def test_stats_collector(self):
+
+        registry = CollectorRegistry()
+        registry.register(StatsCollector("pool", lambda: {"in_use": 3, "waits": 7, "name": "x"}, counters = ("waits",)))
+
+        self.assertEqual(3, registry.get_sample_value("pool_in_use"))
+        self.assertEqual(7, registry.get_sample_value("pool_waits_total"))
+        self.assertIsNone(registry.get_sample_value("pool_name"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from fastapi import FastAPI
+
+from src.services.queries import QueryCounterMiddleware, QueryStats, count_queries
+from src.services.metrics import instrument_engine
+
+
+class TestQueryCounter(unittest.TestCase):
+
+    def setUp(self):
+
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass = NullPool)
+        instrument_engine(self.engine.sync_engine)
+        self.app = FastAPI()
+
+        @self.app.get("/items")
+        async def read_items(n: int = 1):
+            async with self.engine.connect() as conn:
+                for item in range(n):
+                    await conn.execute(text("SELECT :item"), {"item": item})
+            return {"items": n}
+
+
+    def test_headers_in_debug(self):
+
+        self.app.add_middleware(QueryCounterMiddleware, debug = True, n_plus_one_threshold = 5)
+
+        with TestClient(self.app) as client:
+            with self.assertLogs("src.services.queries", level = "INFO") as logs:
+                response = client.get("/items", params = {"n": 3})
+
+        self.assertEqual("3", response.headers["X-DB-Queries"])
+        self.assertTrue(response.headers["X-DB-Query-Time"].endswith("ms"))
+        self.assertIn("db_queries=3", logs.output[0])
+
+
+    def test_n_plus_one_warning(self):
+
+        self.app.add_middleware(QueryCounterMiddleware, n_plus_one_threshold = 5)
+
+        with TestClient(self.app) as client:
+            with self.assertLogs("src.services.queries", level = "WARNING") as logs:
+                response = client.get("/items", params = {"n": 5})
+
+        self.assertNotIn("X-DB-Queries", response.headers)
+        self.assertIn("5 runs of SELECT ?", logs.output[0])
+
+
+    def test_count_queries(self):
+
+        with TestClient(self.app) as client:
+            with count_queries() as stats:
+                client.get("/items", params = {"n": 2})
+
+        self.assertEqual(2, stats.count)
+
+
+    def test_executemany_not_repeated(self):
+
+        stats = QueryStats()
+        for _ in range(5):
+            stats.record("INSERT", 0.001, executemany = True)
+        stats.record("SELECT", 0.001)
+
+        self.assertEqual(6, stats.count)
+        self.assertEqual([], stats.repeated(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
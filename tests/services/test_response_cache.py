@@ -0,0 +1,193 @@
+import unittest
+import json
+
+from unittest.mock import AsyncMock, MagicMock
+from datetime import date
+
+from fastapi import Request
+
+from src.services.response_cache import ResponseCache
+from src.schemas import ContactResponse
+from src.database.models import Contacts
+
+
+def make_session(replica: bool = False) -> MagicMock:
+
+    db = MagicMock()
+    db.info = {}
+    db.sync_session.replica = MagicMock() if replica else None
+    return db
+
+
+def make_request(path: str, query: str = "", if_none_match: str | None = None, cache_control: str | None = None) -> Request:
+
+    headers = []
+    if if_none_match:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    if cache_control:
+        headers.append((b"cache-control", cache_control.encode()))
+
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "path_params": {},
+        "headers": headers
+    })
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+
+        self.redis = AsyncMock()
+        self.cache = ResponseCache(ttl = 300, replica_ttl = 5)
+        self.contact = Contacts(
+            id = 1,
+            number = 1,
+            name = "Emily",
+            surname = "Johnson",
+            email_address = "emilyjohnson@test.com",
+            phone_number = "01234567899",
+            birthday = date(1990, 5, 17),
+            additional_data = None,
+            user = 1
+        )
+
+
+    async def test_without_redis(self):
+
+        self.assertIsNone(await self.cache.key(1, make_request("/api/contacts/1")))
+        self.assertIsNone(await self.cache.get(None, make_request("/api/contacts/1")))
+
+        response = await self.cache.respond(None, ContactResponse, self.contact, make_request("/api/contacts/1"), make_session())
+        self.assertEqual("Emily", json.loads(response.body)["name"])
+
+
+    async def test_generation_starts_when_missing(self):
+
+        await self.cache.init(self.redis)
+        self.redis.get.side_effect = [None, b"42"]
+
+        self.assertEqual(42, await self.cache.generation(1))
+        self.redis.set.assert_awaited_once()
+        self.assertTrue(self.redis.set.await_args.kwargs["nx"])
+
+
+    async def test_key(self):
+
+        await self.cache.init(self.redis)
+        self.redis.get.return_value = b"7"
+
+        key = await self.cache.key(1, make_request("/api/contacts/", "limit=10&name=a"))
+        self.assertTrue(key.startswith("contacts:response:1:7:"))
+        self.assertEqual(key, await self.cache.key(1, make_request("/api/contacts/", "name=a&limit=10")))
+        self.assertNotEqual(key, await self.cache.key(1, make_request("/api/contacts/", "limit=20&name=a")))
+        self.assertNotEqual(key, await self.cache.key(1, make_request("/api/contacts/", "limit=10&name=a"), "2024-03-16"))
+
+        self.redis.get.return_value = b"8"
+        self.assertNotEqual(key, await self.cache.key(1, make_request("/api/contacts/", "limit=10&name=a")))
+
+
+    async def test_respond_and_get(self):
+
+        await self.cache.init(self.redis)
+        response = await self.cache.respond("key", ContactResponse, self.contact, make_request("/api/contacts/1"), make_session())
+        self.redis.set.assert_awaited_once_with("key", response.body, ex = 300)
+
+        self.redis.mget.return_value = [response.body, None]
+        cached = await self.cache.get("key", make_request("/api/contacts/1"))
+        self.redis.mget.assert_awaited_once_with("key", "key:replica")
+        self.assertEqual(response.body, cached.body)
+        self.assertEqual("application/json", cached.media_type)
+        self.assertEqual(response.headers["etag"], cached.headers["etag"])
+
+        self.redis.mget.return_value = [None, None]
+        self.assertIsNone(await self.cache.get("key", make_request("/api/contacts/1")))
+
+
+    async def test_replica_response(self):
+
+        await self.cache.init(self.redis)
+        db = make_session(replica = True)
+
+        response = await self.cache.store("key", b"{}", make_request("/api/contacts/1"), db)
+        self.redis.set.assert_awaited_once_with("key:replica", b"{}", ex = 5)
+        self.assertNotIn("etag", response.headers)
+        self.assertNotIn("primary", db.info)
+
+        self.redis.mget.return_value = [None, b"{}"]
+        cached = await self.cache.get("key", make_request("/api/contacts/1"))
+        self.assertEqual(b"{}", cached.body)
+        self.assertNotIn("etag", cached.headers)
+
+        self.redis.set.reset_mock()
+        db.info["primary"] = True
+        response = await self.cache.store("key", b"{}", make_request("/api/contacts/1"), db)
+        self.redis.set.assert_awaited_once_with("key", b"{}", ex = 300)
+        self.assertEqual(self.cache.etag("key"), response.headers["etag"])
+
+
+    async def test_no_cache_bypass(self):
+
+        await self.cache.init(self.redis)
+        self.redis.mget.return_value = [b"{}", None]
+
+        request = make_request("/api/contacts/1", if_none_match = self.cache.etag("key"), cache_control = "no-cache")
+        self.assertIsNone(await self.cache.get("key", request))
+        self.redis.mget.assert_not_awaited()
+
+
+    async def test_not_modified(self):
+
+        await self.cache.init(self.redis)
+        etag = self.cache.etag("key")
+
+        for header in (etag, f'"other", W/{etag}'):
+            response = await self.cache.get("key", make_request("/api/contacts/1", if_none_match = header))
+            self.assertEqual(304, response.status_code)
+            self.assertEqual(etag, response.headers["etag"])
+            self.assertEqual(b"", response.body)
+        self.redis.mget.assert_not_awaited()
+
+        self.redis.mget.return_value = [None, None]
+        self.assertIsNone(await self.cache.get("key", make_request("/api/contacts/1", if_none_match = '"other"')))
+        self.assertNotEqual(etag, self.cache.etag("other"))
+
+
+    async def test_wildcard_needs_representation(self):
+
+        await self.cache.init(self.redis)
+        request = make_request("/api/contacts/999", if_none_match = "*")
+
+        self.redis.mget.return_value = [None, None]
+        self.assertIsNone(await self.cache.get("key", request))
+
+        self.redis.mget.return_value = [b"{}", None]
+        response = await self.cache.get("key", request)
+        self.assertEqual(304, response.status_code)
+
+        for key in ("key", None):
+            response = await self.cache.store(key, b"{}", request, make_session())
+            self.assertEqual(304, response.status_code)
+            self.assertEqual(b"", response.body)
+
+        self.redis.set.assert_awaited_once_with("key", b"{}", ex = 300)
+
+
+    async def test_bump(self):
+
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        pipe.set.return_value = pipe
+        pipe.incr.return_value = pipe
+        pipeline = MagicMock()
+        pipeline.__aenter__.return_value = pipe
+        self.redis.pipeline = MagicMock(return_value = pipeline)
+        await self.cache.init(self.redis)
+
+        await self.cache.bump(1)
+
+        pipe.incr.assert_called_once_with("contacts:generation:1")
+        pipe.execute.assert_awaited_once()
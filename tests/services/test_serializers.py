@@ -0,0 +1,36 @@
+import unittest
+import json
+
+from datetime import date
+
+from src.services.serializers import CONTACT_FIELDS, contacts_json
+from src.schemas import ListContactsResponse
+
+
+class TestSerializers(unittest.TestCase):
+
+    def setUp(self):
+
+        self.rows = [
+            ("Emily", "Johnson", "emilyjohnson@test.com", "+01234567899", date(1990, 5, 17), None, 1, 1),
+            ("Łukasz", "Nowak \"Jr\"", "lukasz@test.com", "+01234567898", date(1985, 2, 28), "note\nline", 7, 2)
+        ]
+
+
+    def test_fields(self):
+
+        self.assertEqual(("name", "surname", "email_address", "phone_number", "birthday", "additional_data", "id", "number"), CONTACT_FIELDS)
+
+
+    def test_matches_response_model(self):
+
+        contacts = [dict(zip(CONTACT_FIELDS, row)) for row in self.rows]
+
+        for next_cursor in (None, 2):
+            expected = ListContactsResponse.model_validate({"contacts": contacts, "next_cursor": next_cursor}).model_dump_json()
+            self.assertEqual(json.loads(expected), json.loads(contacts_json(self.rows, next_cursor)))
+
+
+    def test_empty(self):
+
+        self.assertEqual(b'{"contacts":[],"next_cursor":null}', contacts_json([]))
@@ -0,0 +1,63 @@
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from src.services.templates import TemplateRegistry
+from src.services.email import conf
+
+
+class TestTemplateRegistry(unittest.TestCase):
+
+    def setUp(self):
+
+        self.folder = tempfile.TemporaryDirectory()
+        folder = Path(self.folder.name)
+        (folder / "plain.html").write_text("<p>Hi {{ username }},</p>\n<a href=\"{{host}}{{token}}\">link</a>\n")
+        (folder / "logic.html").write_text("{% if username %}<p>{{ username|upper }}</p>{% endif %}")
+        self.registry = TemplateRegistry(folder)
+        self.registry.load()
+        self.env = Environment(loader = FileSystemLoader(folder), autoescape = select_autoescape())
+
+
+    def tearDown(self):
+
+        self.folder.cleanup()
+
+
+    def test_split_plain_template(self):
+
+        static, names, autoescape = self.registry.fragments["plain.html"]
+
+        self.assertEqual(["username", "host", "token"], names)
+        self.assertEqual(["<p>Hi ", ",</p>\n<a href=\"", "", "\">link</a>"], static)
+        self.assertTrue(autoescape)
+        self.assertNotIn("logic.html", self.registry.fragments)
+
+
+    def test_render_matches_jinja(self):
+
+        context = {"username": "<b>O'Neil</b>", "host": "http://test/", "token": "a.b.c"}
+
+        for name in ("plain.html", "logic.html"):
+            self.assertEqual(self.env.get_template(name).render(**context), self.registry.render(name, **context))
+
+
+    def test_email_verification(self):
+
+        registry = TemplateRegistry(conf.TEMPLATE_FOLDER)
+        registry.load()
+        env = Environment(loader = FileSystemLoader(conf.TEMPLATE_FOLDER), autoescape = select_autoescape())
+        context = {"username": "user", "host": "http://test/", "token": "token"}
+
+        self.assertIn("email_verification.html", registry.fragments)
+        self.assertEqual(
+            env.get_template("email_verification.html").render(**context),
+            registry.render("email_verification.html", **context)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()